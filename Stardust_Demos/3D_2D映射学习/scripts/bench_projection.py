@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量投影内核（projection_kernel.py）与逐个位姿调用 cv2.projectPoints 的速度/精度对比。
+随机生成 N 个 3D 点（棋盘附近、带一点 Z 起伏）和 V 个位姿，分别测：
+- cv2_loop：for 每个位姿 cv2.projectPoints（Python 版每次都会顺带算雅可比）
+- kernel_f64 / kernel_f32：project() 一次算完 (V,N,2)
+- kernel_f64_jac：project(jacobian=True)，同时得到 (V,N,2,18) 的解析雅可比
+耗时取 --repeat 次里的最小值；精度为与 cv2 结果的最大差（像素），雅可比为最大相对差。
+
+用法示例（在 scripts/ 目录中）：
+    python bench_projection.py --views 1000 --points 500
+    python bench_projection.py --views 200 --points 48 --ncoef 5 --repeat 5
+"""
+
+import time, argparse
+import numpy as np
+import cv2
+
+from projection_kernel import project
+
+def parse_args():
+    ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    ap.add_argument("--views", type=int, default=1000, help="位姿数 V")
+    ap.add_argument("--points", type=int, default=500, help="每个位姿的 3D 点数 N")
+    ap.add_argument("--ncoef", type=int, default=8, choices=(0, 4, 5, 8), help="畸变系数个数")
+    ap.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    ap.add_argument("--no-jac", action="store_true", help="不测带雅可比的内核（V*N 很大时省内存）")
+    ap.add_argument("--seed", type=int, default=0, help="随机种子")
+    return ap.parse_args()
+
+def timed(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    V, N = args.views, args.points
+    obj = np.c_[rng.uniform(0, 10, (N, 2)), rng.uniform(-0.5, 0.5, N)]
+    rvecs = rng.normal(0, 0.4, (V, 3))
+    tvecs = np.c_[rng.uniform(-8, -2, (V, 2)), rng.uniform(15, 40, V)]
+    K = np.array([[1000.0, 0, 640], [0, 1000.0, 480], [0, 0, 1]])
+    dist = np.array([0.1, -0.25, 1e-3, -5e-4, 0.08, 0.01, -0.02, 0.03])[:args.ncoef]
+
+    print(f"V={V} 个位姿 × N={N} 个点，畸变系数 {args.ncoef} 个")
+
+    def cv_loop():
+        out = np.empty((V, N, 2))
+        for v in range(V):
+            p, _ = cv2.projectPoints(obj, rvecs[v], tvecs[v], K, dist)
+            out[v] = p.reshape(-1, 2)
+        return out
+
+    t_cv, uv_cv = timed(cv_loop, args.repeat)
+    rows = [("cv2_loop", t_cv, 0.0, "")]
+    for name, dtype in (("kernel_f64", np.float64), ("kernel_f32", np.float32)):
+        t, uv = timed(lambda: project(obj, rvecs, tvecs, K, dist, dtype=dtype), args.repeat)
+        rows.append((name, t, float(np.abs(uv - uv_cv).max()), ""))
+    if not args.no_jac:
+        t, (uv, J) = timed(lambda: project(obj, rvecs, tvecs, K, dist, jacobian=True), args.repeat)
+        jerr = 0.0
+        ncol = 10 + len(dist)
+        for v in np.linspace(0, V - 1, min(V, 20)).astype(int):   # 抽查几个位姿的雅可比
+            _, jc = cv2.projectPoints(obj, rvecs[v], tvecs[v], K, dist)
+            jc = jc.reshape(N, 2, -1)
+            jerr = max(jerr, float((np.abs(jc - J[v][..., :ncol]) / (1 + np.abs(jc))).max()))
+        rows.append(("kernel_f64_jac", t, float(np.abs(uv - uv_cv).max()), f"{jerr:.2e}"))
+
+    print(f"\n{'方式':16s} {'耗时ms':>10s} {'加速':>8s} {'与cv2最大差px':>14s} {'雅可比相对差':>12s}")
+    for name, t, err, jerr in rows:
+        print(f"{name:16s} {t * 1e3:10.2f} {t_cv / t:7.1f}x {err:14.2e} {jerr:>12s}")
+
+if __name__ == "__main__":
+    main()
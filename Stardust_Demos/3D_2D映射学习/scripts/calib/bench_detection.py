@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+角点检测器对比：把登记在 VARIANTS 里的各种检测方式（findChessboardCorners 的不同 flags 组合、
+FAST_CHECK、findChessboardCornersSB、由粗到细 1/k）跑在同一批图片上，逐张记录
+耗时、是否检出、与参考方式（--reference，默认是标定脚本现在用的 classic）的角点偏差，输出对比表。
+用来挑「满足精度要求里最快的」检测方式，不再凭感觉选 flags。
+
+- 每张图只解码一次（彩色解码 + 转灰度，耗时单列为「解码」），各方式只计检测 + 亚像素的时间，
+  由粗到细方式额外计入缩小解码的时间
+- 耗时取 --repeat 次里的最小值
+- 偏差：与参考方式的角点逐点比较（平均/最大，像素）；偶数×偶数的棋盘可能整体倒序（旋转 180°），
+  两种顺序取偏差小的，倒序的记 reversed=1
+- 结果：控制台打印汇总表；--out 写逐张明细 CSV，同目录写一份 *_summary.csv
+
+用法示例（在 calib/ 目录中）：
+    python bench_detection.py --path ../../data/chessboard_multi_angle --nx 8 --ny 6
+    python bench_detection.py --path ../../data/chessboard_multi_angle --nx 8 --ny 6 --variants classic fast sb coarse4 --repeat 5
+    python bench_detection.py --list     # 列出所有登记的检测方式
+"""
+
+import os, glob, time, csv, argparse
+import numpy as np
+import cv2
+
+from corner_cache import find_corners_coarse, coarse_window
+
+CB_ADAPT = cv2.CALIB_CB_ADAPTIVE_THRESH
+CB_NORM = cv2.CALIB_CB_NORMALIZE_IMAGE
+CB_FAST = cv2.CALIB_CB_FAST_CHECK
+# 与三个标定脚本 --subpix 时相同的亚像素参数
+SUBPIX = ((11,11), (-1,-1), (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3))
+
+def classic(flags, subpix=True):
+    def run(gray, data, pattern):
+        ret, corners = cv2.findChessboardCorners(gray, pattern, flags)
+        if ret and subpix:
+            win, zero, criteria = SUBPIX
+            corners = cv2.cornerSubPix(gray, corners, win, zero, criteria)
+        return ret, corners
+    return run
+
+def sb(flags):
+    # SB 自带亚像素精度，不再 cornerSubPix
+    def run(gray, data, pattern):
+        return cv2.findChessboardCornersSB(gray, pattern, flags=flags)
+    return run
+
+def coarse(k, flags=CB_ADAPT | CB_NORM):
+    # 与 corner_cache.detect_corners(coarse=k) 相同：小图检测 -> 放大 -> 原图精修，失败退回原图
+    def run(gray, data, pattern):
+        ret, corners = find_corners_coarse(data, gray, pattern, flags, k)
+        refine = coarse_window(SUBPIX, k)
+        if not ret:
+            ret, corners = cv2.findChessboardCorners(gray, pattern, flags)
+            refine = SUBPIX
+        if ret:
+            win, zero, criteria = refine
+            corners = cv2.cornerSubPix(gray, corners, win, zero, criteria)
+        return ret, corners
+    return run
+
+# 名称 -> (说明, 检测函数 fn(gray, 原始字节, pattern) -> (ret, corners))；新方式在这里登记即可
+VARIANTS = {
+    "classic":       ("ADAPTIVE|NORMALIZE + 亚像素（标定脚本当前做法）", classic(CB_ADAPT | CB_NORM)),
+    "fast":          ("ADAPTIVE|NORMALIZE|FAST_CHECK + 亚像素（--fast）",  classic(CB_ADAPT | CB_NORM | CB_FAST)),
+    "adaptive":      ("ADAPTIVE + 亚像素",                                  classic(CB_ADAPT)),
+    "normalize":     ("NORMALIZE + 亚像素",                                 classic(CB_NORM)),
+    "plain":         ("flags=0 + 亚像素",                                    classic(0)),
+    "classic_nosub": ("ADAPTIVE|NORMALIZE，不做亚像素",                      classic(CB_ADAPT | CB_NORM, subpix=False)),
+    "sb":            ("findChessboardCornersSB 默认",                         sb(0)),
+    "sb_accuracy":   ("findChessboardCornersSB EXHAUSTIVE|ACCURACY",
+                      sb(cv2.CALIB_CB_EXHAUSTIVE | cv2.CALIB_CB_ACCURACY)),
+    "coarse2":       ("由粗到细 1/2（--coarse 2）",                           coarse(2)),
+    "coarse4":       ("由粗到细 1/4（--coarse 4）",                           coarse(4)),
+    "coarse8":       ("由粗到细 1/8（--coarse 8）",                           coarse(8)),
+}
+
+def parse_args():
+    ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    ap.add_argument("--path", help="图片目录")
+    ap.add_argument("--nx", type=int, help="内角点列数（横向）")
+    ap.add_argument("--ny", type=int, help="内角点行数（纵向）")
+    ap.add_argument("--variants", nargs="+", default=list(VARIANTS), help="要对比的检测方式（见 --list）")
+    ap.add_argument("--reference", default="classic", help="计算偏差时作为基准的检测方式")
+    ap.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    ap.add_argument("--out", default="detector_bench.csv", help="逐张明细 CSV；汇总写到同名 *_summary.csv")
+    ap.add_argument("--list", action="store_true", help="列出登记的检测方式后退出")
+    args = ap.parse_args()
+    if not args.list and (args.path is None or args.nx is None or args.ny is None):
+        ap.error("需要 --path、--nx、--ny")
+    return args
+
+def collect_images(folder):
+    exts = ("*.jpg","*.jpeg","*.png","*.bmp","*.tif","*.tiff","*.webp")
+    imgs = []
+    for e in exts:
+        imgs += glob.glob(os.path.join(folder, e))
+    imgs.sort()
+    return imgs
+
+def timed(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+def disagreement(corners, ref):
+    """(平均偏差, 最大偏差, 是否倒序)；两种顺序取平均偏差小的"""
+    a, b = corners.reshape(-1, 2), ref.reshape(-1, 2)
+    if len(a) != len(b):
+        return None
+    e = np.linalg.norm(a - b, axis=1)
+    r = np.linalg.norm(a[::-1] - b, axis=1)
+    if r.mean() < e.mean():
+        return float(r.mean()), float(r.max()), True
+    return float(e.mean()), float(e.max()), False
+
+def main():
+    args = parse_args()
+    if args.list:
+        for name, (desc, _) in VARIANTS.items():
+            print(f"{name:14s} {desc}")
+        return
+    unknown = [v for v in args.variants + [args.reference] if v not in VARIANTS]
+    if unknown:
+        print(f"❌ 未登记的检测方式：{unknown}，可用：{list(VARIANTS)}")
+        return
+    imgs = collect_images(args.path)
+    if not imgs:
+        print("❌ 未找到图片，请检查 --path")
+        return
+
+    pattern = (args.nx, args.ny)
+    names = list(dict.fromkeys([args.reference] + args.variants))   # 参考方式总是先跑
+    rows = []
+    decode_ms = []
+    print(f"共 {len(imgs)} 张，棋盘内角点 = {pattern}，检测方式 {len(names)} 种，参考 = {args.reference}")
+    for fp in imgs:
+        with open(fp, "rb") as f:
+            data = f.read()
+        t_dec, img = timed(lambda: cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), 1)
+        if img is None:
+            print(f"[跳过] 无法读取：{fp}")
+            continue
+        t_cvt, gray = timed(lambda: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 1)
+        decode_ms.append((t_dec + t_cvt) * 1e3)
+        ref_corners = None
+        line = []
+        for name in names:
+            fn = VARIANTS[name][1]
+            t, (ret, corners) = timed(lambda: fn(gray, data, pattern), args.repeat)
+            ret = bool(ret)
+            if name == args.reference and ret:
+                ref_corners = corners
+            dev = disagreement(corners, ref_corners) if ret and ref_corners is not None else None
+            rows.append({
+                "image": os.path.basename(fp), "variant": name, "ok": int(ret), "ms": round(t * 1e3, 2),
+                "mean_dev_px": "" if dev is None else round(dev[0], 4),
+                "max_dev_px": "" if dev is None else round(dev[1], 4),
+                "reversed": "" if dev is None else int(dev[2]),
+            })
+            line.append(f"{name}={'OK' if ret else 'FAIL'}/{t * 1e3:.1f}ms")
+        print(f"  {os.path.basename(fp)}  " + "  ".join(line))
+    if not rows:
+        print("❌ 没有可读取的图片")
+        return
+
+    with open(args.out, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+    # 汇总：检出率、总/中位耗时、相对参考的加速、偏差
+    ref_total = sum(r["ms"] for r in rows if r["variant"] == args.reference)
+    summary = []
+    for name in names:
+        rs = [r for r in rows if r["variant"] == name]
+        ms = np.array([r["ms"] for r in rs])
+        devs = [r for r in rs if r["mean_dev_px"] != ""]
+        summary.append({
+            "variant": name, "ok": sum(r["ok"] for r in rs), "images": len(rs),
+            "total_ms": round(float(ms.sum()), 1), "median_ms": round(float(np.median(ms)), 2),
+            "speedup": round(ref_total / ms.sum(), 2) if ms.sum() else "",
+            "mean_dev_px": round(float(np.mean([r["mean_dev_px"] for r in devs])), 4) if devs else "",
+            "max_dev_px": round(float(np.max([r["max_dev_px"] for r in devs])), 4) if devs else "",
+            "compared": len(devs),
+        })
+    summary_path = os.path.splitext(args.out)[0] + "_summary.csv"
+    with open(summary_path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(summary[0]))
+        w.writeheader()
+        w.writerows(summary)
+
+    print(f"\n=== 汇总（解码+转灰度 平均 {np.mean(decode_ms):.1f} ms/张，未计入下表）===")
+    print(f"{'variant':14s} {'检出':>7s} {'总耗时ms':>10s} {'中位ms':>8s} {'加速':>6s} {'平均偏差':>9s} {'最大偏差':>9s}")
+    for s in summary:
+        print(f"{s['variant']:14s} {s['ok']:>3d}/{s['images']:<3d} {s['total_ms']:10.1f} {s['median_ms']:8.2f} "
+              f"{str(s['speedup']) + 'x':>6s} {str(s['mean_dev_px']):>9s} {str(s['max_dev_px']):>9s}")
+    print(f"\n✅ 明细：{args.out}\n   汇总：{summary_path}\n   偏差相对于 {args.reference}，只统计双方都检出的图")
+
+if __name__ == "__main__":
+    main()
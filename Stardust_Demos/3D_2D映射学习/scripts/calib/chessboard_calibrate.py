@@ -6,6 +6,7 @@
 - calib_out/params.npz  （K、dist、image_size、rvecs、tvecs、RMS）
 - calib_out/params.yaml （便于人读/其他程序用）
 - calib_out/xxx_corners.jpg （角点可视化）
+- calib_out/views.csv （启用 --max-views / --reject-rms 时：每张图是否参与标定、被剔除的原因）
 - 控制台打印整体 RMS 和每张图的重投影误差 （标定好内参和畸变后，把棋盘3D点投影回去，和实际检测到的2D角点比一比，算出的平均误差。
 单位是像素。误差越小越好：0.2~0.5 px 通常算很不错，1 px 也能接受。
 每张图的误差：同样的逻辑，但分图统计。可以看出哪张图质量差（模糊/反光/角点检测错误）。
@@ -15,12 +16,27 @@
     说明：脚本所在上一级data/目录下有多张棋盘照片，棋盘内角点8x6，每格24mm，启用亚像素优化
     如果是屏幕棋盘：没有真实物理尺度，--square 用默认 1.0。这样 tvec 的单位就是“格子单位”。
     如果是打印棋盘：比如 A4，格子边长 24 mm，那么运行时加 --square 24.0。这样 tvec 就是毫米单位，你能得到相机距离棋盘的实际毫米数。
+
+视角很多（比如从视频抽帧，几百张）时：
+    python chessboard_calibrate.py --path ../data/frames --nx 8 --ny 6 --subpix --max-views 40 --reject-rms 1.0
+    --max-views：按姿态/覆盖的差异贪心挑最多 N 个视角参与标定（相邻帧几乎一样的姿态只留一个），标定快很多
+    --reject-rms：标定后把单张 rms 超过阈值的视角剔掉重新标定，直到没有超标的（最多 10 轮，至少保留 3 张）
+    抽帧里模糊/过曝的多时加 --min-sharpness 100 --max-clipped 0.2：检测前先用缩小解码做质量预筛（quality_filter.py），
+    跳过的帧列在控制台和 quality_skipped.csv（views.csv 里状态为 low_quality）
+    几百张时角点可视化也很占时间和磁盘：--vis-max-dim 1280 --vis-quality 80 缩小后在后台线程写，--no-vis 不写
 """
 
-import os, glob, argparse, math
+import os, sys, csv, glob, argparse, math, functools
 import numpy as np
 import cv2
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from projection_kernel import reprojection_errors
+from corner_cache import detect_corners, add_detect_args, cache_from_args
+from pool_utils import add_workers_arg, imap_ordered
+from quality_filter import add_quality_args, thresholds_from_args, check_file, format_reason, report_skipped
+from vis_writer import SYNC_VIS, add_vis_args, vis_from_args, vis_write, flush_vis
+
 def parse_args():
     ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     ap.add_argument("--path", required=True, help="图片目录")
@@ -30,6 +46,12 @@ def parse_args():
     ap.add_argument("--subpix", action="store_true", help="亚像素优化角点")
     ap.add_argument("--fast", action="store_true", help="CALIB_CB_FAST_CHECK（更快，可能漏检）")
     ap.add_argument("--outdir", default="calib_out", help="输出目录")
+    ap.add_argument("--max-views", type=int, default=0, help="最多用多少个视角标定（按姿态/覆盖差异贪心挑选），0 为全部")
+    ap.add_argument("--reject-rms", type=float, default=0.0, help="单张 rms 超过该值(px)的视角剔除后重新标定，0 为不剔除")
+    add_detect_args(ap)
+    add_quality_args(ap)
+    add_vis_args(ap)
+    add_workers_arg(ap)
     return ap.parse_args()
 
 def collect_images(folder):
@@ -47,17 +69,91 @@ def build_object_points(nx, ny, square):
     return objp
 
 def per_view_errors(object_points, image_points, K, dist, rvecs, tvecs):
-    errs = []
-    for objp, imgp, rvec, tvec in zip(object_points, image_points, rvecs, tvecs):
-        proj, _ = cv2.projectPoints(objp, rvec, tvec, K, dist)
-        proj = proj.reshape(-1,2)
-        e = np.linalg.norm(imgp.reshape(-1,2) - proj, axis=1)  # per-point error
-        errs.append({
-            "mean": float(e.mean()),
-            "rms": float(np.sqrt((e**2).mean())),
-            "max": float(e.max())
-        })
-    return errs
+    # 所有视角一次批量投影（见 projection_kernel.py），结果与逐张 cv2.projectPoints 一致
+    return reprojection_errors(object_points, image_points, K, dist, rvecs, tvecs)
+
+REJECT_MAX_ROUNDS = 10
+MIN_VIEWS = 3
+
+def view_features(corners, nx, ny, img_size):
+    """
+    单个视角的姿态/覆盖特征，用于挑选差异大的视角。标定前没有 K，用 f≈max(w,h)、主点取图像中心的近似内参分解单应：
+    [中心x/w, 中心y/h, log(棋盘边长/图像边长), 板法向x, 板法向y, 0.5cos2θ, 0.5sin2θ]
+    θ 是棋盘 x 轴在图像里的朝向；取 2θ 是因为偶数×偶数的棋盘角点顺序可能整体转 180°，两种顺序要得到同样的特征
+    """
+    w, h = img_size
+    pts = corners.reshape(-1, 2).astype(np.float64)
+    grid = np.mgrid[0:nx, 0:ny].T.reshape(-1, 2).astype(np.float64)
+    H, _ = cv2.findHomography(grid, pts)
+    f = float(max(w, h))
+    K0 = np.array([[f, 0, w / 2.0], [0, f, h / 2.0], [0, 0, 1.0]])
+    B = np.linalg.solve(K0, H)
+    r1 = B[:, 0] / np.linalg.norm(B[:, 0])
+    r2 = B[:, 1] / np.linalg.norm(B[:, 1])
+    n = np.cross(r1, r2)
+    n /= np.linalg.norm(n)
+    if n[2] < 0:
+        n = -n
+    d = pts[nx - 1] - pts[0]
+    theta2 = 2.0 * math.atan2(d[1], d[0])
+    area = cv2.contourArea(cv2.convexHull(pts.astype(np.float32)))
+    size = math.log(max(math.sqrt(area / float(w * h)), 1e-6))
+    c = pts.mean(axis=0)
+    return np.array([c[0] / w, c[1] / h, size, n[0], n[1], 0.5 * math.cos(theta2), 0.5 * math.sin(theta2)])
+
+def select_views(features, budget):
+    """贪心最远点采样：先取离均值最远的视角，之后每次取与已选视角最小距离最大的；返回按原顺序排好的下标"""
+    F = np.asarray(features)
+    if budget <= 0 or budget >= len(F):
+        return list(range(len(F)))
+    first = int(np.argmax(np.linalg.norm(F - F.mean(axis=0), axis=1)))
+    chosen = [first]
+    dmin = np.linalg.norm(F - F[first], axis=1)
+    while len(chosen) < budget:
+        nxt = int(np.argmax(dmin))
+        chosen.append(nxt)
+        dmin = np.minimum(dmin, np.linalg.norm(F - F[nxt], axis=1))
+    return sorted(chosen)
+
+def coverage(corners_list, img_size, grid=8):
+    """角点落到的图像网格（grid×grid）比例，衡量视角集合对画面（尤其边角畸变区）的覆盖"""
+    w, h = img_size
+    hit = np.zeros((grid, grid), bool)
+    for c in corners_list:
+        p = c.reshape(-1, 2)
+        gx = np.clip((p[:, 0] / w * grid).astype(int), 0, grid - 1)
+        gy = np.clip((p[:, 1] / h * grid).astype(int), 0, grid - 1)
+        hit[gy, gx] = True
+    return float(hit.mean())
+
+def calibrate_views(objpoints, imgpoints, img_size, reject_rms=0.0):
+    """
+    标定；reject_rms>0 时剔除单张 rms 超标的视角后重新标定，直到没有超标的。
+    返回 (保留的下标, [(剔除的下标, 当时的rms, 轮次)], (ret, K, dist, rvecs, tvecs), 保留视角的误差)
+    """
+    active = list(range(len(objpoints)))
+    rejected = []
+    for rnd in range(1, REJECT_MAX_ROUNDS + 2):
+        ret, K, dist, rvecs, tvecs = cv2.calibrateCamera(
+            objectPoints=[objpoints[i] for i in active],
+            imagePoints=[imgpoints[i] for i in active],
+            imageSize=img_size,
+            cameraMatrix=None,
+            distCoeffs=None
+        )
+        errs = per_view_errors([objpoints[i] for i in active], [imgpoints[i] for i in active], K, dist, rvecs, tvecs)
+        if reject_rms <= 0 or rnd > REJECT_MAX_ROUNDS:
+            break
+        bad = {i: e["rms"] for i, e in zip(active, errs) if e["rms"] > reject_rms}
+        if not bad:
+            break
+        if len(active) - len(bad) < MIN_VIEWS:
+            print(f"⚠️ 第 {rnd} 轮有 {len(bad)} 张超过 {reject_rms}px，剔除后不足 {MIN_VIEWS} 张，停止剔除")
+            break
+        print(f"第 {rnd} 轮：RMS={ret:.4f}px，剔除 {len(bad)} 张 rms > {reject_rms}px 的视角后重新标定")
+        rejected += [(i, r, rnd) for i, r in bad.items()]
+        active = [i for i in active if i not in bad]
+    return active, rejected, (ret, K, dist, rvecs, tvecs), errs
 
 def save_yaml(path, K, dist, img_size, rms):
     fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
@@ -68,6 +164,25 @@ def save_yaml(path, K, dist, img_size, rms):
     fs.write("rms_reprojection_error", float(rms))
     fs.release()
 
+def detect_one(fp, pattern, flags, subpix, outdir, cache, coarse=1, quality=None, vis_cfg=SYNC_VIS):
+    """
+    单张图：质量预筛 + 检测 + 写角点可视化；返回 (image_size 或 None(无法读取), ret, corners, 预筛结果)。可在子进程里执行
+    预筛不合格时不检测，预筛结果为 (原因, Quality)，否则为 None
+    """
+    q, reason = check_file(fp, quality)
+    if reason is not None:
+        return None, False, None, (reason, q)
+    img, ret, corners, size, _ = detect_corners(fp, pattern, flags, subpix, cache, coarse, decode=vis_cfg.enabled)
+    if size is None:
+        return None, False, None, None
+    if vis_cfg.enabled:
+        vis = img.copy()
+        if ret:
+            cv2.drawChessboardCorners(vis, pattern, corners, True)
+        base = os.path.splitext(os.path.basename(fp))[0]
+        vis_write(vis_cfg, os.path.join(outdir, f"{base}_corners.jpg"), vis)
+    return size, ret, corners, None
+
 def main():
     args = parse_args()
     os.makedirs(args.outdir, exist_ok=True)
@@ -82,53 +197,75 @@ def main():
 
     objpoints = []  # 3D points per image
     imgpoints = []  # 2D points per image
+    view_names = []  # 与 imgpoints 一一对应（检测失败的图不在里面）
+    status = {}     # 图片名 -> views.csv 里的状态
+    skipped = []    # 质量预筛跳过的 (图片名, 原因, Quality)
     img_size = None
 
     flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE
     if args.fast:
         flags |= cv2.CALIB_CB_FAST_CHECK
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3)
+    subpix = ((11,11), (-1,-1), criteria) if args.subpix else None
+    cache = cache_from_args(args)
 
     print(f"共 {len(imgs)} 张候选，棋盘内角点 = ({nx},{ny})，square = {args.square}")
     ok_files = 0
-    for fp in imgs:
-        img = cv2.imread(fp)
-        if img is None:
+    job = functools.partial(detect_one, pattern=(nx, ny), flags=flags, subpix=subpix,
+                            outdir=args.outdir, cache=cache, coarse=args.coarse,
+                            quality=thresholds_from_args(args), vis_cfg=vis_from_args(args))
+    for fp, (size, ret, corners, skip) in zip(imgs, imap_ordered(job, imgs, args.workers)):
+        if skip is not None:
+            print(f"[SKIP] {fp}  {format_reason(skip[0])}")
+            status[os.path.basename(fp)] = ("low_quality", "")
+            skipped.append((os.path.basename(fp), skip[0], skip[1]))
+            continue
+        if size is None:
             print(f"[跳过] 无法读取：{fp}")
+            status[os.path.basename(fp)] = ("unreadable", "")
             continue
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         if img_size is None:
-            img_size = (gray.shape[1], gray.shape[0])  # (w,h)
+            img_size = size  # (w,h)
 
-        ret, corners = cv2.findChessboardCorners(gray, (nx, ny), flags)
-        vis = img.copy()
         if ret:
-            if args.subpix:
-                corners = cv2.cornerSubPix(gray, corners, (11,11), (-1,-1), criteria)
             objpoints.append(objp_template.copy())
             imgpoints.append(corners)
-
-            cv2.drawChessboardCorners(vis, (nx, ny), corners, True)
+            view_names.append(os.path.basename(fp))
             ok_files += 1
             print(f"[OK]  {fp}")
         else:
             print(f"[FAIL] {fp}")
-        base = os.path.splitext(os.path.basename(fp))[0]
-        cv2.imwrite(os.path.join(args.outdir, f"{base}_corners.jpg"), vis)
+            status[os.path.basename(fp)] = ("no_corners", "")
 
+    flush_vis()
+    report_skipped(args.outdir, skipped)
     if len(objpoints) < 3:
         print(f"\n⚠️ 生效图片过少（{len(objpoints)}），建议≥10张、角度/距离多样再试。")
         return
 
-    # 标定
+    # 视角筛选：姿态/覆盖差异最大的 --max-views 个
+    if 0 < args.max_views < len(objpoints):
+        feats = [view_features(c, nx, ny, img_size) for c in imgpoints]
+        keep = select_views(feats, args.max_views)
+        cov_all = coverage(imgpoints, img_size)
+        for i in set(range(len(objpoints))) - set(keep):
+            status[view_names[i]] = ("redundant", "")
+        objpoints = [objpoints[i] for i in keep]
+        imgpoints = [imgpoints[i] for i in keep]
+        view_names = [view_names[i] for i in keep]
+        print(f"\n视角筛选：从 {len(feats)} 个有效视角中选出 {len(keep)} 个，"
+              f"画面覆盖 {cov_all:.0%} -> {coverage(imgpoints, img_size):.0%}")
+
+    # 标定（--reject-rms 时迭代剔除误差大的视角）
     print("\n开始标定 ...")
-    ret, K, dist, rvecs, tvecs = cv2.calibrateCamera(
-        objectPoints=objpoints,
-        imagePoints=imgpoints,
-        imageSize=img_size,
-        cameraMatrix=None,
-        distCoeffs=None
-    )
+    active, rejected, (ret, K, dist, rvecs, tvecs), view_errs = calibrate_views(
+        objpoints, imgpoints, img_size, args.reject_rms)
+    rejected = [(view_names[i], r, rnd) for i, r, rnd in rejected]
+    for fp, r, rnd in rejected:
+        status[fp] = ("rejected", f"{r:.4f}")
+    objpoints = [objpoints[i] for i in active]
+    imgpoints = [imgpoints[i] for i in active]
+    view_names = [view_names[i] for i in active]
     # ret 是整体 RMS（像素）
     print("\n=== 标定结果 ===")
     print(f"Image size: {img_size}")
@@ -136,20 +273,37 @@ def main():
     print("K = \n", K)
     print("dist = ", dist.ravel())
 
-    # 每张图误差
-    view_errs = per_view_errors(objpoints, imgpoints, K, dist, rvecs, tvecs)
+    # 每张图误差（只含参与标定的视角）
     print("\n每张图重投影误差（px）:")
-    for i, (fp, e) in enumerate(zip([os.path.basename(p) for p in imgs], view_errs)):
+    for i, (fp, e) in enumerate(zip(view_names, view_errs)):
         print(f"  [{i:02d}] {fp:30s}  mean={e['mean']:.3f}  rms={e['rms']:.3f}  max={e['max']:.3f}")
 
+    selecting = args.max_views > 0 or args.reject_rms > 0
+    if selecting:
+        for fp, e in zip(view_names, view_errs):
+            status[fp] = ("selected", f"{e['rms']:.4f}")
+        n_red = sum(1 for v in status.values() if v[0] == "redundant")
+        print(f"\n最终参与标定 {len(view_names)} 张（筛掉相似视角 {n_red} 张，剔除误差大的 {len(rejected)} 张）：")
+        print("  " + ", ".join(view_names))
+        for fp, r, rnd in rejected:
+            print(f"  [剔除] 第 {rnd} 轮 {fp}  rms={r:.3f}")
+        views_csv = os.path.join(args.outdir, "views.csv")
+        with open(views_csv, "w", newline="") as f:
+            w = csv.writer(f)   # 文件名里可能有逗号、引号
+            w.writerow(["filename", "status", "rms_px"])
+            for fp in imgs:
+                st, rms = status.get(os.path.basename(fp), ("", ""))
+                w.writerow([os.path.basename(fp), st, rms])
+
     # 保存参数
     np.savez(os.path.join(args.outdir, "params.npz"),
              K=K, dist=dist, image_size=np.array(img_size),
              rvecs=np.array(rvecs, dtype=object),
              tvecs=np.array(tvecs, dtype=object),
-             rms=ret)
+             rms=ret, view_names=np.array(view_names))
     save_yaml(os.path.join(args.outdir, "params.yaml"), K, dist, img_size, ret)
-    print(f"\n✅ 已保存：\n  - {os.path.join(args.outdir, 'params.npz')}\n  - {os.path.join(args.outdir, 'params.yaml')}\n  - 角点可视化：{args.outdir}/*.jpg")
+    print(f"\n✅ 已保存：\n  - {os.path.join(args.outdir, 'params.npz')}\n  - {os.path.join(args.outdir, 'params.yaml')}" +
+          ("" if args.no_vis else f"\n  - 角点可视化：{args.outdir}/*.jpg"))
 
 if __name__ == "__main__":
     main()
@@ -10,6 +10,10 @@
     python chessboard_check.py --path ../data --nx 8 --ny 6 --subpix
     单张照片（指定文件）：
     python chessboard_check.py --path chess.jpg --nx 11 --ny 7 --subpix
+    先跳过模糊/过曝的照片（见 quality_filter.py，跳过的图列在 quality_skipped.csv）：
+    python chessboard_check.py --path ../data --nx 8 --ny 6 --min-sharpness 100 --max-clipped 0.2
+    可视化图片缩小到长边 1280、JPEG 质量 80（后台线程写，见 vis_writer.py）；只要统计不要图片时用 --no-vis：
+    python chessboard_check.py --path ../data --nx 8 --ny 6 --vis-max-dim 1280 --vis-quality 80
 """
 
 import cv2
@@ -17,8 +21,14 @@ import os
 import sys
 import glob
 import argparse
+import functools
 import numpy as np
 
+from corner_cache import detect_corners, add_detect_args, cache_from_args
+from pool_utils import add_workers_arg, imap_ordered
+from quality_filter import add_quality_args, thresholds_from_args, check_file, format_reason, report_skipped
+from vis_writer import SYNC_VIS, add_vis_args, vis_from_args, vis_write, flush_vis
+
 def parse_args():
     ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     ap.add_argument("--path", required=True, help="图片路径：单张文件或目录")
@@ -27,6 +37,10 @@ def parse_args():
     ap.add_argument("--outdir", default="chess_check_out", help="结果可视化输出目录")
     ap.add_argument("--subpix", action="store_true", help="是否进行亚像素角点优化")
     ap.add_argument("--fast", action="store_true", help="启用 FAST_CHECK（更快但可能漏检）")
+    add_detect_args(ap)
+    add_quality_args(ap)
+    add_vis_args(ap)
+    add_workers_arg(ap)
     return ap.parse_args()
 
 def collect_images(p):
@@ -40,6 +54,29 @@ def collect_images(p):
         imgs = [p]
     return imgs
 
+def check_one(fp, pattern, flags, subpix, outdir, cache, coarse=1, quality=None, vis_cfg=SYNC_VIS):
+    """
+    单张图：质量预筛 + 检测 + 写可视化；返回 (能否读取, 是否检测到, 输出路径, 预筛结果)。可在子进程里执行
+    关闭可视化（vis_cfg.enabled=False）时输出路径为 None
+    预筛不合格时不检测，返回 (True, False, None, (原因, Quality))；否则预筛结果为 None
+    """
+    q, reason = check_file(fp, quality)
+    if reason is not None:
+        return True, False, None, (reason, q)
+    # 检测 + 亚像素优化（在灰度图上），命中缓存时直接复用
+    img, ret, corners, size, _ = detect_corners(fp, pattern, flags, subpix, cache, coarse, decode=vis_cfg.enabled)
+    if size is None:
+        return False, False, None, None
+
+    # 画出检测结果并保存（后台写）
+    if not vis_cfg.enabled:
+        return True, ret, None, None
+    vis = img.copy()
+    cv2.drawChessboardCorners(vis, pattern, corners, ret)
+    base = os.path.splitext(os.path.basename(fp))[0]
+    out_fp = vis_write(vis_cfg, os.path.join(outdir, f"{base}_corners.jpg"), vis)
+    return True, ret, out_fp, None
+
 def main():
     args = parse_args()
     os.makedirs(args.outdir, exist_ok=True)
@@ -57,38 +94,36 @@ def main():
     # 亚像素参数
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 50, 1e-3)
     win = (11, 11)
+    subpix = (win, (-1, -1), criteria) if args.subpix else None
+    cache = cache_from_args(args)
 
     total = 0
     ok_cnt = 0
+    skipped = []
 
     print(f"共 {len(imgs)} 张待检测，棋盘内角点尺寸 = ({args.nx}, {args.ny})")
-    for fp in imgs:
+    job = functools.partial(check_one, pattern=(args.nx, args.ny), flags=flags, subpix=subpix,
+                            outdir=args.outdir, cache=cache, coarse=args.coarse,
+                            quality=thresholds_from_args(args), vis_cfg=vis_from_args(args))
+    for fp, (readable, ret, out_fp, skip) in zip(imgs, imap_ordered(job, imgs, args.workers)):
         total += 1
-        img = cv2.imread(fp)
-        if img is None:
+        if not readable:
             print(f"[跳过] 无法读取：{fp}")
             continue
+        if skip is not None:
+            print(f"[SKIP] 质量不合格：{fp}  {format_reason(skip[0])}")
+            skipped.append((os.path.basename(fp), skip[0], skip[1]))
+            continue
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        ret, corners = cv2.findChessboardCorners(gray, (args.nx, args.ny), flags)
-        if ret and args.subpix:
-            # 亚像素优化（在灰度图上）
-            corners = cv2.cornerSubPix(gray, corners, win, (-1, -1), criteria)
-
-        # 画出检测结果并保存
-        vis = img.copy()
-        cv2.drawChessboardCorners(vis, (args.nx, args.ny), corners, ret)
-        base = os.path.splitext(os.path.basename(fp))[0]
-        out_fp = os.path.join(args.outdir, f"{base}_corners.jpg")
-        cv2.imwrite(out_fp, vis)
-
+        out_msg = f"  → 输出：{out_fp}" if out_fp else ""
         if ret:
             ok_cnt += 1
-            print(f"[OK]  检测到角点：{fp}  → 输出：{out_fp}")
+            print(f"[OK]  检测到角点：{fp}{out_msg}")
         else:
-            print(f"[FAIL] 未检测到角点：{fp}  → 输出：{out_fp}")
+            print(f"[FAIL] 未检测到角点：{fp}{out_msg}")
 
+    flush_vis()
+    report_skipped(args.outdir, skipped)
     print(f"\n完成：{ok_cnt}/{total} 张检测到角点。结果已保存到：{args.outdir}")
 
 if __name__ == "__main__":
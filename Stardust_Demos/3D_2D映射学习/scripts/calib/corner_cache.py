@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+棋盘角点检测 + 磁盘缓存，chessboard_check / chessboard_calibrate / solve_extrinsics 共用。
+
+findChessboardCorners 是这几个脚本里最慢的一步（12MP 照片一张要几秒），而同一批照片往往先 check、
+再标定、再求外参，要检测好几遍。这里把检测结果按「图片内容 sha1 + 棋盘尺寸 + flags」存成 npz：
+- <sha1>_<nx>x<ny>_f<flags>.npz            findChessboardCorners 的原始结果（失败也缓存）
+- <sha1>_<nx>x<ny>_f<flags>_sp<参数>.npz   在上面基础上 cornerSubPix 的结果
+亚像素参数不同的脚本（check 用 50 次迭代，标定/外参用 100 次）可以共用原始检测，只重做亚像素。
+图片内容变了 sha1 就变，不会用到旧结果；缓存目录可以随时整个删掉。
+
+由粗到细（coarse=k，k 取 2/4/8）：直接用 IMREAD_REDUCED_GRAYSCALE_k 解码出 1/k 的灰度图，在小图上找棋盘，
+角点按像素中心对齐放大回原图 (p+0.5)*k-0.5，再在原图灰度上 cornerSubPix 精修（窗口至少覆盖 ±k 像素）；
+小图上找不到就退回原图检测。findChessboardCorners 的耗时随分辨率增长很快，小图上快得多，
+速度和角点精度的对比见 bench_detection.py。coarse 不同的结果分开缓存。
+
+用法：
+    cache = CornerCache("corner_cache")          # cache=None 表示不用缓存
+    det = detect_corners(fp, (nx, ny), flags, subpix=(win, (-1, -1), criteria), cache=cache, coarse=1)
+    det.img（decode=False 且命中缓存时为 None） / det.ret / det.corners / det.image_size(w,h) / det.cached
+"""
+
+import os
+import hashlib
+import tempfile
+from collections import namedtuple
+import numpy as np
+import cv2
+
+Detection = namedtuple("Detection", "img ret corners image_size cached")
+
+REDUCED_GRAY = {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+                8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+# 没要求亚像素时，粗检测放大后的精修参数（窗口另按 k 放大）
+COARSE_REFINE = ((5, 5), (-1, -1), (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-2))
+
+
+def subpix_tag(subpix):
+    """(win, zero_zone, criteria) -> 文件名里用的短标签"""
+    win, zero, (ctype, iters, eps) = subpix
+    return f"w{win[0]}x{win[1]}z{zero[0]}x{zero[1]}c{ctype}i{iters}e{eps:g}"
+
+
+class CornerCache(object):
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, digest, pattern, flags, subpix=None, coarse=1):
+        name = f"{digest}_{pattern[0]}x{pattern[1]}_f{int(flags)}"
+        if coarse > 1:
+            name += f"_c{coarse}"
+        if subpix is not None:
+            name += "_sp" + subpix_tag(subpix)
+        return os.path.join(self.cache_dir, name + ".npz")
+
+    def load(self, digest, pattern, flags, subpix=None, coarse=1):
+        """命中返回 (ret, corners 或 None, image_size, scale)，否则 None；scale 为实际检测用的缩小倍数"""
+        path = self._path(digest, pattern, flags, subpix, coarse)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as D:
+                ret = bool(D["ret"])
+                corners = D["corners"] if ret else None
+                scale = int(D["scale"]) if "scale" in D.files else 1
+                return ret, corners, tuple(int(v) for v in D["image_size"]), scale
+        except Exception:
+            return None   # 写了一半/损坏的缓存当作没命中，重新检测后覆盖
+
+    def save(self, digest, pattern, flags, subpix, ret, corners, image_size, coarse=1, scale=1):
+        path = self._path(digest, pattern, flags, subpix, coarse)
+        # 临时文件名唯一：多个进程/脚本同时写同一条缓存时不会互相踩
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, ret=bool(ret), image_size=np.array(image_size), scale=int(scale),
+                         corners=corners if ret else np.zeros((0, 1, 2), np.float32))
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+
+def coarse_window(subpix, k):
+    """粗检测放大后的精修参数：窗口半径至少 2k，保证能把 ±k 像素的误差拉回来"""
+    win, zero, criteria = subpix if subpix is not None else COARSE_REFINE
+    half = max(win[0], win[1], 2 * k)
+    return (half, half), zero, criteria
+
+
+def find_corners_coarse(data, gray, pattern, flags, k):
+    """
+    在 1/k 的小图上找角点并放大回原图坐标（还没精修）；小图上找不到或解码失败返回 (False, None)。
+    data 为原始图片字节，gray 为原图灰度（只用来核对尺寸）
+    """
+    small = cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED_GRAY[k])
+    if small is None or abs(small.shape[0] * k - gray.shape[0]) >= k or abs(small.shape[1] * k - gray.shape[1]) >= k:
+        return False, None   # 尺寸对不上（例如 EXIF 旋转处理不一致），不冒险
+    ret, corners = cv2.findChessboardCorners(small, pattern, flags)
+    if not ret:
+        return False, None
+    return True, ((corners + 0.5) * k - 0.5).astype(np.float32)
+
+
+def detect_corners(fp, pattern, flags, subpix=None, cache=None, coarse=1, decode=True):
+    """
+    读图 + 检测角点（+ 亚像素）。coarse=1 时结果与直接调用 findChessboardCorners / cornerSubPix 相同；
+    coarse=k>1 时先在 1/k 小图上检测再到原图精修（见模块说明），小图失败则退回 coarse=1 的流程。
+    subpix: None 或 (winSize, zeroZone, criteria)
+    decode=False：调用方不需要彩色图（不画可视化）时，命中缓存就不解码图片，img 为 None，
+    此时用 image_size 是否为 None 判断能否读取
+    无法读取时返回 Detection(None, False, None, None, False)
+    """
+    with open(fp, "rb") as f:
+        data = f.read()
+    if not data:
+        return Detection(None, False, None, None, False)
+    digest = hashlib.sha1(data).hexdigest() if cache is not None else None
+
+    # 先查缓存再解码：命中时只读了文件字节、算了 sha1，省掉整张大图的解码
+    # coarse>1 时最终结果一定经过精修，按实际精修参数存，不会和原始检测的缓存撞名
+    final_sp = subpix if coarse == 1 else coarse_window(subpix, coarse)
+    hit = cache.load(digest, pattern, flags, final_sp, coarse) if cache is not None else None
+    if hit is not None and not decode:
+        return Detection(None, hit[0], hit[1], hit[2], True)
+
+    # 与 cv2.imread 相同的解码（同样按 EXIF 方向旋转）
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return Detection(None, False, None, None, False)
+    image_size = (img.shape[1], img.shape[0])  # (w,h)
+    if hit is not None:
+        return Detection(img, hit[0], hit[1], image_size, True)
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    raw = cache.load(digest, pattern, flags, None, coarse) if cache is not None else None
+    if raw is not None:
+        ret, corners, scale = raw[0], raw[1], raw[3]
+    else:
+        ret, corners, scale = False, None, 1
+        if coarse > 1:
+            ret, corners = find_corners_coarse(data, gray, pattern, flags, coarse)
+            scale = coarse if ret else 1
+        if not ret:
+            ret, corners = cv2.findChessboardCorners(gray, pattern, flags)
+        if cache is not None:
+            cache.save(digest, pattern, flags, None, ret, corners, image_size, coarse, scale)
+    refine = coarse_window(subpix, scale) if scale > 1 else subpix
+    if ret and refine is not None:
+        win, zero, criteria = refine
+        corners = cv2.cornerSubPix(gray, corners, win, zero, criteria)
+        if cache is not None and final_sp is not None:
+            cache.save(digest, pattern, flags, final_sp, ret, corners, image_size, coarse, scale)
+    return Detection(img, ret, corners, image_size, raw is not None)
+
+
+def add_detect_args(ap):
+    """--cache-dir / --no-cache / --coarse，三个标定脚本共用"""
+    ap.add_argument("--cache-dir", default="corner_cache", help="角点检测缓存目录（三个标定脚本可共用）")
+    ap.add_argument("--no-cache", action="store_true", help="不读写角点缓存，每次重新检测")
+    ap.add_argument("--coarse", type=int, default=1, choices=(1, 2, 4, 8),
+                    help="由粗到细检测：先在 1/k 小图上找角点再回原图精修，1 为直接在原图上检测")
+
+
+def cache_from_args(args):
+    return None if args.no_cache else CornerCache(args.cache_dir)
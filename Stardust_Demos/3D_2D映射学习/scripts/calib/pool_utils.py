@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标定脚本共用的 --workers 进程池：每张图（读图、灰度、角点检测、亚像素、写可视化）是独立的，
+分给多个进程做，结果按输入顺序返回，主进程照原来的顺序打印/写 CSV，输出与串行一致。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def add_workers_arg(ap):
+    ap.add_argument("--workers", type=int, default=1,
+                    help=f"并行检测的进程数；1 为串行，0 为 CPU 核数（本机 {os.cpu_count()}）")
+
+
+def imap_ordered(fn, items, workers=1):
+    """等价于 map(fn, items)，workers>1 时在进程池里执行；fn 必须是模块顶层函数（或其 partial）"""
+    items = list(items)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(items) <= 1:
+        yield from map(fn, items)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        yield from pool.map(fn, items)
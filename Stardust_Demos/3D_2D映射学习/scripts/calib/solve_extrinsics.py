@@ -18,12 +18,23 @@ python solve_extrinsics.py --path ../data --nx 8 --ny 6 --square 24.0 --axes 3 -
 
 # 想先不考虑畸变（不考虑calib_out/params.yaml里的畸变参数）
 python olve_extrinsics.py --img ../data --nx 8 --ny 6 --params calib_out/params.yaml --subpix --no-dist
+
+# 先跳过模糊/过曝的照片（quality_filter.py；跳过的图在 CSV 里留空行，并列在 quality_skipped.csv）
+python solve_extrinsics.py --path ../data --nx 8 --ny 6 --params calib_out/params.yaml --min-sharpness 100 --max-clipped 0.2
+
+# 只要外参 CSV、不要叠轴图（或 --vis-max-dim 1280 --vis-quality 80 写小图，见 vis_writer.py）
+python solve_extrinsics.py --path ../data --nx 8 --ny 6 --params calib_out/params.yaml --no-vis
 """
 
-import os, glob, argparse, csv
+import os, glob, argparse, csv, functools
 import numpy as np
 import cv2
 
+from corner_cache import detect_corners, add_detect_args, cache_from_args
+from pool_utils import add_workers_arg, imap_ordered
+from quality_filter import add_quality_args, thresholds_from_args, check_file, format_reason, report_skipped
+from vis_writer import SYNC_VIS, add_vis_args, vis_from_args, vis_write, flush_vis
+
 def read_params(params_path: str):
     ext = os.path.splitext(params_path)[1].lower()
     if ext == ".yaml" or ext == ".yml":
@@ -61,33 +72,33 @@ def collect_images(path_arg: str):
         # 当作单个文件
         return [path_arg]
 
-def solve_one(img_path, nx, ny, square, K, dist, outdir, subpix=True, try_swap=False, axes_len_mult=3.0):
-    img = cv2.imread(img_path)
-    if img is None:
-        return False, f"无法读取：{img_path}", None, None, None
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
+def solve_one(img_path, nx, ny, square, K, dist, outdir, subpix=True, try_swap=False, axes_len_mult=3.0, cache=None, coarse=1,
+              quality=None, vis_cfg=SYNC_VIS):
+    """
+    返回 (ok, msg, rvec, tvec, out_img, reproj_rms_px, 预筛结果)；失败时 rvec~reproj_rms_px 为 None，关闭可视化时 out_img 为 None，
+    预筛结果：质量不合格（没做检测）时为 (原因, Quality)，否则为 None
+    """
+    q, reason = check_file(img_path, quality)
+    if reason is not None:
+        return False, f"质量不合格 {format_reason(reason)}", None, None, None, None, (reason, q)
     flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE
-    ret, corners = cv2.findChessboardCorners(gray, (nx, ny), flags)
+    sp = ((11,11), (-1,-1), (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3)) if subpix else None
+    img, ret, corners, size, _ = detect_corners(img_path, (nx, ny), flags, sp, cache, coarse, decode=vis_cfg.enabled)
+    if size is None:
+        return False, f"无法读取：{img_path}", None, None, None, None, None
 
     # 如果不成功且允许尝试交换 nx/ny
     swapped = False
     if (not ret) and try_swap:
-        ret, corners = cv2.findChessboardCorners(gray, (ny, nx), flags)
+        _, ret, corners, _, _ = detect_corners(img_path, (ny, nx), flags, sp, cache, coarse, decode=False)
         if ret:
             nx, ny = ny, nx
             swapped = True
 
     if not ret:
         base = os.path.splitext(os.path.basename(img_path))[0]
-        cv2.imwrite(os.path.join(outdir, f"{base}_no_corners.jpg"), img)
-        return False, "未检测到角点", None, None, None
-
-    if subpix:
-        corners = cv2.cornerSubPix(
-            gray, corners, (11,11), (-1,-1),
-            (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3)
-        )
+        vis_write(vis_cfg, os.path.join(outdir, f"{base}_no_corners.jpg"), img)
+        return False, "未检测到角点", None, None, None, None, None
 
     objp = build_obj_points(nx, ny, square)
 
@@ -96,28 +107,29 @@ def solve_one(img_path, nx, ny, square, K, dist, outdir, subpix=True, try_swap=F
     if not ok:
         ok, rvec, tvec = cv2.solvePnP(objp, corners, K, dist, flags=cv2.SOLVEPNP_ITERATIVE)
     if not ok:
-        return False, "solvePnP 失败", None, None, None
+        return False, "solvePnP 失败", None, None, None, None, None
 
     # 计算该图重投影误差（均值/RMS/最大）
     proj, _ = cv2.projectPoints(objp, rvec, tvec, K, dist)
     e = np.linalg.norm(proj.reshape(-1,2) - corners.reshape(-1,2), axis=1)
     err_mean, err_rms, err_max = float(e.mean()), float(np.sqrt((e**2).mean())), float(e.max())
 
-    # 画三轴
-    axis_len = float(axes_len_mult) * float(square)
-    cv2.drawFrameAxes(img, K, dist, rvec, tvec, axis_len)  # 红X 绿Y 蓝Z
+    out_img = None
+    if vis_cfg.enabled:
+        # 画三轴
+        axis_len = float(axes_len_mult) * float(square)
+        cv2.drawFrameAxes(img, K, dist, rvec, tvec, axis_len)  # 红X 绿Y 蓝Z
 
-    # 角点可视化（便于回看）
-    vis = img.copy()
-    cv2.drawChessboardCorners(vis, (nx, ny), corners, True)
+        # 角点可视化（便于回看）
+        vis = img.copy()
+        cv2.drawChessboardCorners(vis, (nx, ny), corners, True)
 
-    base = os.path.splitext(os.path.basename(img_path))[0]
-    os.makedirs(outdir, exist_ok=True)
-    out_img = os.path.join(outdir, f"{base}_axes.jpg")
-    cv2.imwrite(out_img, vis)
+        base = os.path.splitext(os.path.basename(img_path))[0]
+        os.makedirs(outdir, exist_ok=True)
+        out_img = vis_write(vis_cfg, os.path.join(outdir, f"{base}_axes.jpg"), vis)
 
     msg = f"OK  rms={err_rms:.3f}px  mean={err_mean:.3f}px  max={err_max:.3f}px" + (" [swapped nx/ny]" if swapped else "")
-    return True, msg, rvec.reshape(3), tvec.reshape(3), out_img
+    return True, msg, rvec.reshape(3), tvec.reshape(3), out_img, err_rms, None
 
 def main():
     ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
@@ -131,7 +143,12 @@ def main():
     ap.add_argument("--try-swap", action="store_true", help="如果 (nx,ny) 未检出则尝试 (ny,nx)")
     ap.add_argument("--axes", type=float, default=3.0, help="坐标轴长度 = axes * square")
     ap.add_argument("--no-dist", action="store_true", help="Ignore lens distortion (treat distCoeffs=None)")
+    add_detect_args(ap)
+    add_quality_args(ap)
+    add_vis_args(ap)
+    add_workers_arg(ap)
     args = ap.parse_args()
+    cache = cache_from_args(args)
 
     K, dist = read_params(args.params)
     dist_use = None if args.no_dist else dist
@@ -146,32 +163,26 @@ def main():
     with open(csv_path, "w", newline="") as f:
         w = csv.writer(f)
         w.writerow(["filename","rvec_x","rvec_y","rvec_z","tvec_x","tvec_y","tvec_z","reproj_rms_px","out_image"])
-        for p in imgs:
-            ok, msg, rvec, tvec, out_img = solve_one(
-                p, args.nx, args.ny, args.square, K, dist_use,
-                outdir=args.outdir, subpix=args.subpix,
-                try_swap=args.try_swap, axes_len_mult=args.axes
-            )
+        job = functools.partial(
+            solve_one, nx=args.nx, ny=args.ny, square=args.square, K=K, dist=dist_use,
+            outdir=args.outdir, subpix=args.subpix,
+            try_swap=args.try_swap, axes_len_mult=args.axes, cache=cache, coarse=args.coarse,
+            quality=thresholds_from_args(args), vis_cfg=vis_from_args(args)
+        )
+        # 各图在进程池里并行求解，按输入顺序打印、写 CSV
+        skipped = []
+        for p, (ok, msg, rvec, tvec, out_img, rms, skip) in zip(imgs, imap_ordered(job, imgs, args.workers)):
             if ok:
-                # 为了把 rms 一并写入 CSV，再次计算一下
-                img = cv2.imread(p); gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                ret, corners = cv2.findChessboardCorners(gray, (args.nx, args.ny),
-                        cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE)
-                if not ret and args.try_swap:
-                    ret, corners = cv2.findChessboardCorners(gray, (args.ny, args.nx),
-                        cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE)
-                if args.subpix and ret:
-                    corners = cv2.cornerSubPix(gray, corners, (11,11), (-1,-1),
-                        (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3))
-                objp = build_obj_points(args.nx, args.ny, args.square)
-                proj, _ = cv2.projectPoints(objp, rvec.reshape(3,1), tvec.reshape(3,1), K, dist_use)
-                e = np.linalg.norm(proj.reshape(-1,2) - corners.reshape(-1,2), axis=1)
-                rms = float(np.sqrt((e**2).mean()))
+                # rms 由 solve_one 一并算好，不再重新读图检测
                 print(f"[{os.path.basename(p)}] {msg}")
-                w.writerow([p, *rvec.tolist(), *tvec.tolist(), rms, out_img])
+                w.writerow([p, *rvec.tolist(), *tvec.tolist(), rms, out_img or ""])
             else:
-                print(f"[{os.path.basename(p)}] FAIL: {msg}")
+                print(f"[{os.path.basename(p)}] {'SKIP' if skip is not None else 'FAIL'}: {msg}")
+                if skip is not None:
+                    skipped.append((os.path.basename(p), skip[0], skip[1]))
                 w.writerow([p, "", "", "", "", "", "", "", ""])
-    print(f"\n✅ 完成。结果：\n- 叠轴图片：{args.outdir}/*_axes.jpg\n- 外参CSV：{csv_path}\n- 注意：tvec 的单位与 --square 一致。")
+    flush_vis()
+    report_skipped(args.outdir, skipped)
+    print(f"\n✅ 完成。结果：\n" + ("" if args.no_vis else f"- 叠轴图片：{args.outdir}/*_axes.jpg\n") + f"- 外参CSV：{csv_path}\n- 注意：tvec 的单位与 --square 一致。")
 if __name__ == "__main__":
     main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量标定：边读边标。输入是视频文件（或摄像头编号），或一个正在不断写入图片的目录；
+每来一帧先用便宜的检查把没用的帧挡掉，留下的视角攒成一个集合，攒够就标定一次，
+标定结果比当前发布的更好时就更新 params.yaml / params.npz（格式与 chessboard_calibrate.py 相同）。
+
+每帧的处理（越靠前越便宜，绝大多数帧在前几步就被跳过）：
+1. 取 1/k 的小灰度图（目录模式直接 IMREAD_REDUCED_GRAYSCALE_k 解码，视频帧 INTER_AREA 缩小）
+2. 质量预筛（quality_filter.py）：拉普拉斯方差 < --min-sharpness 记为 blurry，
+   --max-dark / --max-clipped 打开时欠曝/过曝的记为 underexposed / overexposed；
+   统计在长边 640 的图上算（1/k 小图长边不到 640 时改用大一档的缩小图），阈值与分辨率、--coarse 无关
+3. 小图上 findChessboardCorners（带 FAST_CHECK，没有棋盘的帧很快返回），找不到记为 no_board
+4. 姿态/覆盖特征（chessboard_calibrate.view_features）与已收视角的最小距离 < --min-diff 记为 redundant
+5. 到原图上 cornerSubPix 精修，收下这个视角（目录模式到这一步才解码原图）
+
+留出视角：每收下 --holdout-every（≥2）个视角，第 --holdout-every 个不参与标定，留作验证（frames.csv 里记为 holdout）。
+标定：标定视角数 ≥ --min-views 且至少有 1 个留出视角后，每收 --every 个新视角标定一次；从上一次的 K/dist 热启动
+（CALIB_USE_INTRINSIC_GUESS），迭代少、也更稳定。标定视角超过 --max-views 时用 select_views 按差异保留。
+是否发布：标定自身的 RMS 是在拟合用的视角上算的，新结果总是不比旧参数差，不能拿来比较；
+所以新旧两组 K/dist 都固定下来，在留出视角上逐张 solvePnP 求位姿算 RMS，新结果更小才发布
+（刚收下一个坏视角、把标定带偏时就不会发布）；写临时文件再 os.replace，读的一方不会读到半个文件。
+
+用法示例（在 calib/ 目录中）：
+    python stream_calibrate.py --video 0 --nx 8 --ny 6 --step 5          # 摄像头 0，也可以给视频文件路径
+    python stream_calibrate.py --watch ../../data/incoming --nx 8 --ny 6 --idle-timeout 60
+输出：
+- calib_stream_out/params.npz / params.yaml   每次留出视角上的 RMS 变好时更新
+- calib_stream_out/frames.csv                  每帧的处理结果（accepted / holdout / blurry / no_board / redundant / ...）
+                                               和质量统计，边处理边写，中途 Ctrl-C 也保留已处理的帧
+"""
+
+import os, csv, time, argparse
+import numpy as np
+import cv2
+
+from corner_cache import REDUCED_GRAY, coarse_window
+from quality_filter import QUALITY_DIM, add_quality_args, thresholds_from_args, gray_quality, reject_reason
+from chessboard_calibrate import (collect_images, build_object_points,
+                                  view_features, select_views, coverage, save_yaml)
+
+SUBPIX = ((11, 11), (-1, -1), (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3))
+STALE_POLLS = 5   # 目录模式：0 字节的文件连续这么多次轮询没变，就先不等它（大小变了再重新排队）
+
+def parse_args():
+    ap = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", help="视频文件路径，或摄像头编号（如 0）")
+    src.add_argument("--watch", help="监视的图片目录（新写入的图片按文件名顺序处理）")
+    ap.add_argument("--nx", type=int, required=True, help="内角点列数（横向）")
+    ap.add_argument("--ny", type=int, required=True, help="内角点行数（纵向）")
+    ap.add_argument("--square", type=float, default=1.0, help="每格边长（单位任意；打印用真实毫米，屏幕可取1.0）")
+    ap.add_argument("--outdir", default="calib_stream_out", help="输出目录")
+    ap.add_argument("--coarse", type=int, default=2, choices=(1, 2, 4, 8), help="在 1/k 小图上做清晰度检查和棋盘检测")
+    ap.add_argument("--step", type=int, default=1, help="视频每隔几帧取一帧")
+    ap.add_argument("--min-diff", type=float, default=0.1, help="与已收视角的特征距离低于该值视为重复")
+    ap.add_argument("--min-views", type=int, default=5, help="攒够多少个视角开始标定")
+    ap.add_argument("--max-views", type=int, default=40, help="最多保留多少个视角（超出按差异挑选）")
+    ap.add_argument("--every", type=int, default=1, help="每收多少个新视角重新标定一次")
+    ap.add_argument("--holdout-every", type=int, default=5,
+                    help="每收下这么多个视角留 1 个不参与标定，只用来比较新旧标定结果（至少 2）")
+    ap.add_argument("--poll", type=float, default=0.5, help="目录模式：轮询间隔（秒）")
+    ap.add_argument("--idle-timeout", type=float, default=10.0, help="目录模式：多久没有新图片就结束（秒），负数为一直等")
+    # 视频里模糊帧很多，默认就打开清晰度检查。data/chessboard_multi_angle 的 8 张照片在长边 640 的图上
+    # 拉普拉斯方差 1211~1666；同样的照片加 61 像素的水平运动模糊后降到 37~333，其中 <60 的已经找不到棋盘。
+    # 100 离清晰帧很远，只挡掉糊得厉害的帧
+    add_quality_args(ap, min_sharpness=100.0)
+    args = ap.parse_args()
+    if args.holdout_every < 2:
+        # 0 没有留出视角、1 全部留出，都永远不会标定；发布与否只能靠留出视角判断
+        ap.error("--holdout-every 至少为 2")
+    return args
+
+def video_frames(src, step):
+    """逐帧产出 (名字, 读小图的函数, 读原图灰度的函数)；跳过的帧只 grab 不解码"""
+    cap = cv2.VideoCapture(int(src) if src.isdigit() else src)
+    if not cap.isOpened():
+        print(f"❌ 无法打开视频：{src}")
+        return
+    idx = -1
+    try:
+        while True:
+            idx += 1
+            if idx % step:
+                if not cap.grab():
+                    break
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            def small(k, gray=gray):
+                if k == 1:
+                    return gray
+                return cv2.resize(gray, (gray.shape[1] // k, gray.shape[0] // k), interpolation=cv2.INTER_AREA)
+            yield f"frame_{idx:06d}", small, (lambda gray=gray: gray)
+    finally:
+        cap.release()
+
+def folder_frames(folder, poll, idle_timeout):
+    """
+    监视目录：文件大小连续两次轮询不变（且不为 0）才认为写完；按文件名顺序产出，
+    idle_timeout 秒内没有产出新图片就结束（负数一直等）。一直是 0 字节、或一直在变大的文件不算有新图片，
+    不会让目录模式永远不结束；0 字节的文件 STALE_POLLS 次轮询没变就不再跟踪，之后大小变了再重新排队
+    """
+    seen = set()
+    pending = {}   # 路径 -> (上次看到的大小, 连续几次没变)
+    stale = {}     # 不再跟踪的 0 字节文件 -> 大小
+    last_new = time.time()
+    while True:
+        ready, still = [], {}
+        for fp in collect_images(folder):
+            if fp in seen:
+                continue
+            try:
+                size = os.path.getsize(fp)
+            except OSError:
+                continue
+            if stale.get(fp) == size:
+                continue
+            stale.pop(fp, None)
+            prev_size, polls = pending.get(fp, (None, 0))
+            if size != prev_size:
+                still[fp] = (size, 0)
+            elif size > 0:
+                ready.append(fp)
+            elif polls + 1 >= STALE_POLLS:
+                stale[fp] = size
+            else:
+                still[fp] = (size, polls + 1)
+        pending = still   # 已经消失的文件顺带清掉
+        for fp in ready:
+            seen.add(fp)
+            def small(k, fp=fp):
+                return cv2.imread(fp, REDUCED_GRAY[k] if k > 1 else cv2.IMREAD_GRAYSCALE)
+            yield os.path.basename(fp), small, (lambda fp=fp: cv2.imread(fp, cv2.IMREAD_GRAYSCALE))
+        if ready:
+            last_new = time.time()
+        elif idle_timeout >= 0 and time.time() - last_new > idle_timeout:
+            return
+        time.sleep(poll)
+
+def rms_with(K, dist, objpoints, imgpoints):
+    """固定 K/dist，逐张 solvePnP 求位姿后的整体 RMS（与 calibrateCamera 的 RMS 同口径），用来在留出视角上打分"""
+    sq, n = 0.0, 0
+    for objp, imgp in zip(objpoints, imgpoints):
+        ok, rvec, tvec = cv2.solvePnP(objp, imgp, K, dist)
+        if not ok:
+            return float("inf")
+        proj, _ = cv2.projectPoints(objp, rvec, tvec, K, dist)
+        sq += float(((proj.reshape(-1, 2) - imgp.reshape(-1, 2)) ** 2).sum())
+        n += len(objp)
+    return float(np.sqrt(sq / n))
+
+def publish(outdir, K, dist, img_size, rms, rvecs, tvecs, view_names, holdout_rms):
+    """与 chessboard_calibrate 相同的 params.npz / params.yaml（npz 里另存留出视角上的 RMS），先写临时文件再替换"""
+    npz = os.path.join(outdir, "params.npz")
+    with open(npz + ".tmp", "wb") as f:
+        np.savez(f, K=K, dist=dist, image_size=np.array(img_size),
+                 rvecs=np.array(rvecs, dtype=object), tvecs=np.array(tvecs, dtype=object),
+                 rms=rms, view_names=np.array(view_names), holdout_rms=holdout_rms)
+    os.replace(npz + ".tmp", npz)
+    yml = os.path.join(outdir, "params.yaml")
+    tmp = os.path.join(outdir, "params.tmp.yaml")   # FileStorage 按后缀决定格式
+    save_yaml(tmp, K, dist, img_size, rms)
+    os.replace(tmp, yml)
+
+def main():
+    args = parse_args()
+    os.makedirs(args.outdir, exist_ok=True)
+
+    nx, ny = args.nx, args.ny
+    pattern = (nx, ny)
+    objp_template = build_object_points(nx, ny, args.square)
+    k = args.coarse
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE | cv2.CALIB_CB_FAST_CHECK
+    refine = coarse_window(SUBPIX, k) if k > 1 else SUBPIX
+    quality = thresholds_from_args(args)
+
+    if args.video is not None:
+        frames = video_frames(args.video, max(args.step, 1))
+        print(f"读取视频 {args.video}（每 {max(args.step, 1)} 帧取 1 帧），棋盘内角点 = {pattern}")
+    else:
+        frames = folder_frames(args.watch, args.poll, args.idle_timeout)
+        print(f"监视目录 {args.watch}（{args.idle_timeout:g}s 无新图片结束），棋盘内角点 = {pattern}")
+
+    names, imgpoints, feats = [], [], []   # 参与标定的视角
+    hold_names, hold_points, hold_feats = [], [], []   # 留出视角：只用来给标定结果打分
+    img_size = None
+    K = dist = None                        # 上一次标定结果（热启动用）
+    pub = None                             # 已发布的 (K, dist, rms, 留出 RMS)
+    counts = {}
+    n_frames = 0
+    n_accepted = 0
+    since_calib = 0
+    n_calib = 0
+    t0 = time.time()
+
+    csv_path = os.path.join(args.outdir, "frames.csv")
+    fcsv = open(csv_path, "w", newline="")
+    log = csv.writer(fcsv)
+    log.writerow(["frame", "status", "sharpness", "mean", "dark", "clipped", "ms"])
+    try:
+        for name, read_small, read_full in frames:
+            t_frame = time.time()
+            small = read_small(k)
+            q = None
+            if small is None:
+                status = "unreadable"
+            else:
+                qk = k
+                while qk > 1 and max(small.shape) * k // qk < QUALITY_DIM:
+                    qk //= 2
+                q = gray_quality(small if qk == k else read_small(qk))
+                reason = reject_reason(q, quality)
+                status = reason[0] if reason is not None else None
+            if status is None:
+                ret, corners = cv2.findChessboardCorners(small, pattern, flags)
+                if not ret:
+                    status = "no_board"
+            if status is None:
+                corners = ((corners + 0.5) * k - 0.5).astype(np.float32) if k > 1 else corners
+                size = (small.shape[1] * k, small.shape[0] * k)
+                f = view_features(corners, nx, ny, size)
+                seen = feats + hold_feats
+                if seen and np.min(np.linalg.norm(np.asarray(seen) - f, axis=1)) < args.min_diff:
+                    status = "redundant"
+            if status is None:
+                gray = read_full()
+                if gray is None:
+                    status = "unreadable"
+                elif img_size is not None and (gray.shape[1], gray.shape[0]) != img_size:
+                    status = "size_mismatch"
+            if status is None:
+                img_size = (gray.shape[1], gray.shape[0])
+                win, zero, criteria = refine
+                corners = cv2.cornerSubPix(gray, corners, win, zero, criteria)
+                f = view_features(corners, nx, ny, img_size)
+                n_accepted += 1
+                if args.holdout_every > 0 and n_accepted % args.holdout_every == 0:
+                    hold_names.append(name)
+                    hold_points.append(corners)
+                    hold_feats.append(f)
+                    status = "holdout"
+                else:
+                    names.append(name)
+                    imgpoints.append(corners)
+                    feats.append(f)
+                    since_calib += 1
+                    status = "accepted"
+            n_frames += 1
+            counts[status] = counts.get(status, 0) + 1
+            stats = ["", "", "", ""] if q is None else [f"{q.sharpness:.1f}", f"{q.mean:.1f}", f"{q.dark:.4f}", f"{q.clipped:.4f}"]
+            log.writerow([name, status] + stats + [f"{(time.time() - t_frame) * 1e3:.1f}"])
+            fcsv.flush()
+            if status == "holdout":
+                print(f"[OK]  {name}  sharpness={q.sharpness:.0f}  留作验证视角 {len(hold_names)}")
+            if status != "accepted":
+                continue
+            print(f"[OK]  {name}  sharpness={q.sharpness:.0f}  视角 {len(names)}")
+
+            if len(names) > args.max_views:
+                keep = select_views(feats, args.max_views)
+                dropped = [names[i] for i in range(len(names)) if i not in set(keep)]
+                names = [names[i] for i in keep]
+                imgpoints = [imgpoints[i] for i in keep]
+                feats = [feats[i] for i in keep]
+                print(f"      视角超过 {args.max_views}，按差异去掉：{', '.join(dropped)}")
+
+            if len(names) < args.min_views or not hold_names or since_calib < args.every:
+                continue
+            since_calib = 0
+            objpoints = [objp_template] * len(names)
+            t_cal = time.time()
+            if K is None:
+                ret, K1, dist1, rvecs, tvecs = cv2.calibrateCamera(objpoints, imgpoints, img_size, None, None)
+            else:
+                ret, K1, dist1, rvecs, tvecs = cv2.calibrateCamera(objpoints, imgpoints, img_size, K.copy(), dist.copy(),
+                                                                   flags=cv2.CALIB_USE_INTRINSIC_GUESS)
+            n_calib += 1
+            K, dist = K1, dist1
+            # 新旧两组参数都在留出视角上打分：这些视角谁都没拿来标定，分数才可比
+            hold_obj = [objp_template] * len(hold_names)
+            score = rms_with(K, dist, hold_obj, hold_points)
+            old = rms_with(pub[0], pub[1], hold_obj, hold_points) if pub is not None else float("inf")
+            msg = (f"      标定 #{n_calib}：{len(names)} 个视角，RMS={ret:.4f}px，覆盖 {coverage(imgpoints, img_size):.0%}，"
+                   f"{(time.time() - t_cal) * 1e3:.0f} ms；{len(hold_names)} 个留出视角上 RMS={score:.4f}px")
+            if score < old:
+                publish(args.outdir, K, dist, img_size, ret, rvecs, tvecs, names, score)
+                pub = (K, dist, ret, score)
+                print(msg + (f"（已发布的 {old:.4f}px）" if np.isfinite(old) else "") + " -> ✅ 发布")
+            else:
+                print(msg + f"，不如已发布的（{old:.4f}px），不发布")
+    except KeyboardInterrupt:
+        print("\n⏹ 已中断")
+    finally:
+        fcsv.close()
+
+    print(f"\n共处理 {n_frames} 帧，用时 {time.time() - t0:.1f}s：" +
+          "，".join(f"{s} {n}" for s, n in sorted(counts.items(), key=lambda x: -x[1])))
+    if pub is None:
+        print(f"⚠️ 标定视角 {len(names)} 个（需要 {args.min_views} 个）、留出视角 {len(hold_names)} 个（至少 1 个），"
+              f"没有发布标定结果\n  逐帧记录：{csv_path}")
+        return
+    K, dist, rms, score = pub
+    print("\n=== 已发布的标定结果 ===")
+    print(f"Image size: {img_size}")
+    print(f"RMS reprojection error: {rms:.4f} px（留出视角 {score:.4f} px）")
+    print("K = \n", K)
+    print("dist = ", dist.ravel())
+    print(f"\n✅ 已保存：\n  - {os.path.join(args.outdir, 'params.npz')}\n  - {os.path.join(args.outdir, 'params.yaml')}"
+          f"\n  - 逐帧记录：{csv_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标定脚本的可视化输出（*_corners.jpg / *_axes.jpg 等）：JPEG 编码和写盘放到后台线程池，
+主流程（检测、标定）不用等它；可以缩小、调 JPEG 质量，或整个关掉。
+
+- --vis-max-dim N：长边大于 N 时先 INTER_AREA 缩到 N 再写（0 为原尺寸）
+- --vis-quality Q：JPEG 质量 0~100（不指定则与 cv2.imwrite 默认一致，默认参数下输出文件与同步写完全相同）
+- --vis-threads N：后台写图线程数；cv2.imwrite 执行时会释放 GIL，能和检测并行
+- --no-vis：不写可视化（无人值守批量跑时用）
+
+--workers 多进程时每个进程各有一个写图线程池（按配置懒创建），进程退出前会把排队的图写完；
+主进程在 main 结束前调用 flush_vis() 等待写完。
+排队的图最多 2*线程数+2 张，写得比算得慢时 write 会阻塞，不会把整批图都压在内存里。
+
+用法：
+    vis = vis_from_args(args)                   # VisConfig，可以直接传给子进程
+    out = vis_write(vis, path, img)             # 返回将要写出的路径；关掉时返回 None、什么都不做
+    ...
+    flush_vis()                                 # 等待本进程排队的图写完
+"""
+
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+VisConfig = namedtuple("VisConfig", "enabled max_dim quality threads")
+SYNC_VIS = VisConfig(True, 0, None, 0)   # 原来的行为：原尺寸、同步 cv2.imwrite
+
+_writers = {}   # VisConfig -> VisWriter（每个进程各自一份）
+
+
+def add_vis_args(ap):
+    ap.add_argument("--no-vis", action="store_true", help="不写可视化图片")
+    ap.add_argument("--vis-max-dim", type=int, default=0, help="可视化图片长边上限（像素），0 为原尺寸")
+    ap.add_argument("--vis-quality", type=int, default=None, help="可视化 JPEG 质量 0~100，不指定为 OpenCV 默认")
+    ap.add_argument("--vis-threads", type=int, default=2, help="后台写可视化图片的线程数，0 为同步写")
+
+
+def vis_from_args(args):
+    return VisConfig(not args.no_vis, args.vis_max_dim, args.vis_quality, args.vis_threads)
+
+
+def _encode_write(path, img, max_dim, quality):
+    h, w = img.shape[:2]
+    if max_dim and max(h, w) > max_dim:
+        s = max_dim / float(max(h, w))
+        img = cv2.resize(img, (max(1, round(w * s)), max(1, round(h * s))), interpolation=cv2.INTER_AREA)
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality is not None else []
+    if not cv2.imwrite(path, img, params):
+        print(f"⚠️ 可视化写入失败：{path}")
+
+
+class VisWriter(object):
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.pool = ThreadPoolExecutor(cfg.threads) if cfg.threads > 0 else None
+        self.slots = threading.BoundedSemaphore(2 * cfg.threads + 2) if cfg.threads > 0 else None
+        self.pending = []
+
+    def write(self, path, img):
+        """img 交给后台后调用方不要再改它"""
+        if self.pool is None:
+            _encode_write(path, img, self.cfg.max_dim, self.cfg.quality)
+            return
+        self.slots.acquire()
+        fut = self.pool.submit(_encode_write, path, img, self.cfg.max_dim, self.cfg.quality)
+        fut.add_done_callback(lambda _: self.slots.release())
+        self.pending.append(fut)
+        if len(self.pending) > 256:
+            self.pending = [f for f in self.pending if not f.done()]
+
+    def flush(self):
+        for fut in self.pending:
+            fut.result()
+        self.pending = []
+
+
+def vis_write(cfg, path, img):
+    """按 cfg 写一张可视化图（可能在后台）；cfg 关闭时不写，返回 None"""
+    if not cfg.enabled:
+        return None
+    writer = _writers.get(cfg)
+    if writer is None:
+        writer = _writers[cfg] = VisWriter(cfg)
+    writer.write(path, img)
+    return path
+
+
+def flush_vis():
+    """等本进程所有排队的可视化图写完"""
+    for writer in _writers.values():
+        writer.flush()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相机模型 + 去畸变/校正映射表缓存
+- 读取 K、dist（calib_out/params.yaml 或 params.npz，与 calib/ 下标定脚本的输出格式一致）
+- initUndistortRectifyMap 生成定点 CV_16SC2 映射表（map1 整数坐标 + map2 1/32 像素插值表），
+  比 CV_32FC1 省一半内存，remap 也更快；cv2.undistort 内部用的就是这种映射表
+- 映射表按 (K, dist, R, P, 尺寸) 的内容哈希缓存：内存里 LRU 留最近 MAP_CACHE_MAX 份，
+  可选再存到磁盘目录（npz），下次运行直接读
+- remap_batch：一批同尺寸的帧共用一份映射表
+
+用法：
+    cam = CameraModel.from_file("outputs/calib_out/params.yaml")
+    und = cam.undistort(img)                               # 等价于 cv2.undistort(img, K, dist)
+    rect = cam.remap(img, R=R1, P=P1)                      # 等价于 initUndistortRectifyMap + remap
+    outs = cam.remap_batch(frames, R=R1, P=P1, cache_dir="map_cache")
+"""
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import cv2
+
+MAP_CACHE_MAX = 4   # 内存里最多留几份映射表（1280x960 一份约 7MB，12MP 一份约 72MB）
+
+_maps = OrderedDict()   # key -> (map1, map2)
+
+
+def read_params(params_path):
+    """(K, dist, image_size 或 None)；image_size 为 (w, h)"""
+    ext = os.path.splitext(params_path)[1].lower()
+    size = None
+    if ext in (".yaml", ".yml"):
+        fs = cv2.FileStorage(params_path, cv2.FILE_STORAGE_READ)
+        if not fs.isOpened():
+            raise FileNotFoundError(params_path)
+        K = fs.getNode("camera_matrix").mat()
+        dist = fs.getNode("distortion_coefficients").mat()
+        w, h = fs.getNode("image_width"), fs.getNode("image_height")
+        if not w.empty() and not h.empty():
+            size = (int(w.real()), int(h.real()))
+        fs.release()
+    elif ext == ".npz":
+        D = np.load(params_path, allow_pickle=True)
+        K, dist = D["K"], D["dist"]
+        if "image_size" in D.files:
+            size = tuple(int(v) for v in D["image_size"])
+    else:
+        raise ValueError(f"Unsupported params file: {params_path}")
+    return K.astype(np.float64), dist.astype(np.float64), size
+
+
+def map_key(K, dist, R, P, size):
+    """映射表的缓存键：各矩阵按 float64 的字节内容 + 尺寸做 sha1"""
+    h = hashlib.sha1()
+    for a in (K, dist, R, P):
+        h.update(b"-" if a is None else np.ascontiguousarray(a, dtype=np.float64).tobytes())
+    h.update(f"{size[0]}x{size[1]}".encode())
+    return h.hexdigest()
+
+
+def undistort_maps(K, dist, R=None, P=None, size=None, cache_dir=None):
+    """
+    CV_16SC2 映射表 (map1, map2)。R=None 为不旋转，P=None 为沿用 K（与 cv2.undistort 相同）；size=(w, h)
+    先查内存，再查 cache_dir（给了的话），都没有才 initUndistortRectifyMap 并回写
+    """
+    P = K if P is None else P
+    key = map_key(K, dist, R, P, size)
+    hit = _maps.get(key)
+    if hit is not None:
+        _maps.move_to_end(key)
+        return hit
+    path = os.path.join(cache_dir, f"remap_{key}.npz") if cache_dir else None
+    maps = None
+    if path and os.path.exists(path):
+        try:
+            with np.load(path) as D:
+                maps = D["map1"], D["map2"]
+        except Exception:
+            maps = None   # 写了一半/损坏的缓存当作没命中，重新生成后覆盖
+    if maps is None:
+        maps = cv2.initUndistortRectifyMap(K, dist, R, P, tuple(size), cv2.CV_16SC2)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            # 临时文件名唯一：多个进程同时生成同一份映射表时不会写进同一个 .tmp
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, map1=maps[0], map2=maps[1])
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+    _maps[key] = maps
+    while len(_maps) > MAP_CACHE_MAX:
+        _maps.popitem(last=False)
+    return maps
+
+
+def remap_batch(frames, maps, interpolation=cv2.INTER_LINEAR, border=cv2.BORDER_CONSTANT):
+    """一批帧套用同一份映射表"""
+    map1, map2 = maps
+    return [cv2.remap(f, map1, map2, interpolation, borderMode=border) for f in frames]
+
+
+class CameraModel(object):
+    def __init__(self, K, dist, image_size=None):
+        self.K = np.asarray(K, dtype=np.float64)
+        self.dist = np.asarray(dist, dtype=np.float64)
+        self.image_size = tuple(image_size) if image_size is not None else None
+
+    @classmethod
+    def from_file(cls, params_path):
+        K, dist, size = read_params(params_path)
+        return cls(K, dist, size)
+
+    def maps(self, R=None, P=None, size=None, cache_dir=None):
+        """size 缺省用标定时的图像尺寸"""
+        size = size or self.image_size
+        if size is None:
+            raise ValueError("需要 size=(w, h)：参数文件里没有图像尺寸")
+        return undistort_maps(self.K, self.dist, R, P, size, cache_dir)
+
+    def remap(self, img, R=None, P=None, cache_dir=None, interpolation=cv2.INTER_LINEAR):
+        size = (img.shape[1], img.shape[0])
+        return remap_batch([img], self.maps(R, P, size, cache_dir), interpolation)[0]
+
+    def undistort(self, img, cache_dir=None):
+        """等价于 cv2.undistort(img, K, dist)，映射表只算一次"""
+        return self.remap(img, cache_dir=cache_dir)
+
+    def remap_batch(self, frames, R=None, P=None, cache_dir=None, interpolation=cv2.INTER_LINEAR):
+        """一批帧去畸变/校正；映射表按帧尺寸各取一次"""
+        maps, out = {}, []
+        for f in frames:
+            size = (f.shape[1], f.shape[0])
+            if size not in maps:
+                maps[size] = self.maps(R, P, size, cache_dir)
+            out += remap_batch([f], maps[size], interpolation)
+        return out
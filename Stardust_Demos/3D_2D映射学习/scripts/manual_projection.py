@@ -5,7 +5,7 @@
 - 读取 K、dist（支持 calib_out/params.yaml 或 .npz）
 - 从 extrinsics_out/extrinsics.csv 读入指定图片的 rvec/tvec
 - 生成一批测试 3D 点（平面角点、平面中心、离平面点），或从 --points 读取自定义点
-- 手动投影（可开关畸变） vs cv2.projectPoints，对比 RMS/Max
+- 手动投影（可开关畸变，公式见 projection_kernel.py） vs cv2.projectPoints，对比 RMS/Max
 - 可视化：原图上画出手算(圆点-洋红) 与 OpenCV(叉号-青色)
 
 用法示例（在 scripts/ 下）：
@@ -24,6 +24,8 @@ import os, csv, argparse
 import numpy as np
 import cv2
 
+from projection_kernel import project
+
 # ---------- IO ----------
 def read_params(params_path: str):
     ext = os.path.splitext(params_path)[1].lower()
@@ -92,41 +94,10 @@ def manual_project(Pw, K, rvec, tvec, dist=None):
     """
     Pw: (N,3) 世界点；K: 3x3；rvec/tvec: 3x1；dist: None 或 (k1,k2,p1,p2,k3[,k4,k5,k6])
     return: (N,2) 像素坐标
+    步骤：Pc = R·Pw + t -> 归一化 x=X/Z, y=Y/Z -> 径向（k4~k6 在分母上，与 OpenCV 相同）+ 切向畸变 -> u=fx·x'+cx, v=fy·y'+cy
+    多个位姿一起算用 projection_kernel.project(Pw, rvecs, tvecs, K, dist)，得到 (V,N,2)
     """
-    R, _ = cv2.Rodrigues(rvec)
-    Pw = Pw.T  # (3,N)
-    Pc = R @ Pw + tvec  # (3,N)
-    X, Y, Z = Pc[0], Pc[1], Pc[2]
-    x = (X/Z).astype(np.float64)
-    y = (Y/Z).astype(np.float64)
-
-    if dist is not None and dist.size > 0:
-        d = dist.ravel().astype(np.float64)
-        k1 = d[0] if d.size>0 else 0.0
-        k2 = d[1] if d.size>1 else 0.0
-        p1 = d[2] if d.size>2 else 0.0
-        p2 = d[3] if d.size>3 else 0.0
-        k3 = d[4] if d.size>4 else 0.0
-        k4 = d[5] if d.size>5 else 0.0
-        k5 = d[6] if d.size>6 else 0.0
-        k6 = d[7] if d.size>7 else 0.0
-
-        r2 = x*x + y*y
-        r4 = r2*r2
-        r6 = r4*r2
-        r8 = r4*r4
-        r10 = r8*r2
-        r12 = r6*r6
-        radial = 1.0 + k1*r2 + k2*r4 + k3*r6 + k4*r8 + k5*r10 + k6*r12
-        x_dist = x*radial + 2*p1*x*y + p2*(r2 + 2*x*x)
-        y_dist = y*radial + p1*(r2 + 2*y*y) + 2*p2*x*y
-        x, y = x_dist, y_dist  # overwrite with distorted coords
-
-    fx, fy = K[0,0], K[1,1]
-    cx, cy = K[0,2], K[1,2]
-    u = fx*x + cx
-    v = fy*y + cy
-    return np.stack([u, v], axis=1)
+    return project(Pw, np.reshape(rvec, (1, 3)), np.reshape(tvec, (1, 3)), K, dist)[0]
 
 # ---------- 主流程 ----------
 def main():
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量投影内核：N 个 3D 点在 V 个位姿下一次广播算完，得到 (V,N,2) 像素坐标，不再逐个位姿调用 cv2.projectPoints。
+- 畸变模型与 OpenCV 相同（8 系数 k1,k2,p1,p2,k3,k4,k5,k6）：
+    radial = (1 + k1*r2 + k2*r4 + k3*r6) / (1 + k4*r2 + k5*r4 + k6*r6)
+    x' = x*radial + 2*p1*x*y + p2*(r2 + 2*x^2)
+    y' = y*radial + p1*(r2 + 2*y^2) + 2*p2*x*y
+  少于 8 个系数时后面补 0；不支持薄棱镜/倾斜传感器（12/14 系数里 s1~s4、tau 非 0 时报错）
+- dtype 可选 float32 / float64（旋转矩阵及其导数按 float64 算好再转换，只有 O(V) 的量）
+- jacobian=True 时同时返回解析雅可比 (V,N,2,18)，列顺序与 cv2.projectPoints 返回的 jacobian 相同：
+    rvec(3) tvec(3) fx fy cx cy k1 k2 p1 p2 k3 k4 k5 k6     （下标见 JAC_* 常量）
+  旋转向量的导数用 Gallego & Yezzi (2015) 的 Rodrigues 导数闭式解
+  J 是 (2,18,V,N) 连续数组的转置视图（写得快），需要连续内存时 np.ascontiguousarray(J)
+  注意内存：V*N*2*18 个数，float64 下 V=N=1000 约 288MB
+
+用法：
+    uv = project(objp, rvecs, tvecs, K, dist)                       # objp (N,3) 或 (V,N,3)，rvecs/tvecs (V,3)
+    uv, J = project(objp, rvecs, tvecs, K, dist, jacobian=True)
+    errs = reprojection_errors(objpoints, imgpoints, K, dist, rvecs, tvecs)   # 每个视角的 mean/rms/max
+速度对比见 bench_projection.py。
+"""
+
+import numpy as np
+
+JAC_RVEC = slice(0, 3)
+JAC_TVEC = slice(3, 6)
+JAC_F = slice(6, 8)
+JAC_C = slice(8, 10)
+JAC_DIST = slice(10, 18)
+JAC_COLS = 18
+
+
+def _skew(v):
+    """(...,3) -> (...,3,3) 反对称矩阵 [v]x"""
+    z = np.zeros(v.shape[:-1], v.dtype)
+    return np.stack([np.stack([z, -v[..., 2], v[..., 1]], -1),
+                     np.stack([v[..., 2], z, -v[..., 0]], -1),
+                     np.stack([-v[..., 1], v[..., 0], z], -1)], -2)
+
+
+def rodrigues(rvecs, jacobian=False):
+    """
+    rvecs (V,3) -> R (V,3,3)；jacobian=True 时另返回 dR (V,3,3,3)，dR[:, i] = dR/d(rvec_i)
+    """
+    r = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3)
+    th2 = (r * r).sum(-1)
+    th = np.sqrt(th2)
+    small = th < 1e-8
+    safe = np.where(small, 1.0, th)
+    k = r / safe[:, None]
+    s, c = np.sin(th), np.cos(th)
+    I = np.eye(3)
+    R = (c[:, None, None] * I + (1 - c)[:, None, None] * k[:, :, None] * k[:, None, :]
+         + s[:, None, None] * _skew(k))
+    R[small] = I + _skew(r[small])
+    if not jacobian:
+        return R
+    # dR/dr_i = (r_i [r]x + [r x (I - R) e_i]x) / |r|^2 * R；r -> 0 时为 [e_i]x
+    S = _skew(r)
+    IR = I - R
+    th2s = np.where(small, 1.0, th2)
+    dR = np.empty((len(r), 3, 3, 3))
+    for i in range(3):
+        term = r[:, i, None, None] * S + _skew(np.cross(r, IR[:, :, i]))
+        dR[:, i] = (term / th2s[:, None, None]) @ R
+        dR[small, i] = _skew(I[i])
+    return R, dR
+
+
+def _dist8(dist):
+    if dist is None:
+        return np.zeros(8)
+    d = np.asarray(dist, dtype=np.float64).ravel()
+    if d.size > 8 and np.any(d[8:] != 0):
+        raise ValueError("只支持 8 个畸变系数（k1,k2,p1,p2,k3,k4,k5,k6），薄棱镜/倾斜项必须为 0")
+    out = np.zeros(8)
+    out[:min(d.size, 8)] = d[:8]
+    return out
+
+
+def project(obj, rvecs, tvecs, K, dist=None, dtype=np.float64, jacobian=False):
+    """
+    obj: (N,3) 所有位姿共用，或 (V,N,3) 每个位姿各一组
+    rvecs, tvecs: (V,3)（(V,3,1) 或单个 (3,)/(3,1) 也可以，单个视为 V=1）
+    K: 3x3；dist: None 或最多 8 个系数
+    返回 uv (V,N,2)；jacobian=True 时返回 (uv, J)，J 为 (V,N,2,18)
+    """
+    dt = np.dtype(dtype)
+    rv = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3)
+    tv = np.asarray(tvecs, dtype=dt).reshape(-1, 3)
+    if jacobian:
+        R, dR = rodrigues(rv, True)
+        dR = dR.astype(dt)
+    else:
+        R = rodrigues(rv)
+    R = R.astype(dt)
+    P = np.asarray(obj, dtype=dt)
+    K = np.asarray(K, dtype=np.float64)
+    fx, fy, cx, cy = (dt.type(v) for v in (K[0, 0], K[1, 1], K[0, 2], K[1, 2]))
+    k1, k2, p1, p2, k3, k4, k5, k6 = (dt.type(v) for v in _dist8(dist))
+    one = dt.type(1)
+
+    # 相机坐标系 Pc = R P + t；按 (V,3,N) 排布，X/Y/Z 各自是连续的 (V,N) 块
+    PT = np.swapaxes(P, -1, -2)                       # (3,N) 或 (V,3,N)
+    Pc = R @ PT
+    Pc += tv[:, :, None]
+    iz = one / Pc[:, 2]
+    x = Pc[:, 0] * iz
+    y = Pc[:, 1] * iz
+
+    r2 = x * x + y * y
+    num = one + r2 * (k1 + r2 * (k2 + r2 * k3))
+    den = one + r2 * (k4 + r2 * (k5 + r2 * k6))
+    iden = one / den
+    radial = num * iden
+    xy2 = 2 * x * y
+    xd = x * radial + p1 * xy2 + p2 * (r2 + 2 * x * x)
+    yd = y * radial + p1 * (r2 + 2 * y * y) + p2 * xy2
+
+    uv = np.stack([fx * xd + cx, fy * yd + cy], axis=-1)
+    if not jacobian:
+        return uv
+
+    # 按 (2,18,V,N) 连续地写，最后返回 (V,N,2,18) 的转置视图
+    JT = np.empty((2, JAC_COLS) + x.shape, dt)
+    # 畸变后坐标对归一化坐标 (x, y) 的导数
+    drad = (k1 + r2 * (2 * k2 + 3 * k3 * r2)) * iden - num * (k4 + r2 * (2 * k5 + 3 * k6 * r2)) * iden * iden
+    d00 = radial + 2 * x * x * drad + 2 * p1 * y + 6 * p2 * x
+    d01 = xy2 * drad + 2 * p1 * x + 2 * p2 * y
+    d11 = radial + 2 * y * y * drad + 6 * p1 * y + 2 * p2 * x
+    # 对相机坐标 (X,Y,Z) 的导数 = diag(fx,fy) · d(x',y')/d(x,y) · d(x,y)/d(X,Y,Z)
+    gu = [fx * d00 * iz, fx * d01 * iz]
+    gv = [fy * d01 * iz, fy * d11 * iz]
+    gu.append(-(gu[0] * x + gu[1] * y))
+    gv.append(-(gv[0] * x + gv[1] * y))
+
+    for i in range(3):
+        dP = dR[:, i] @ PT                                         # (V,3,N)
+        np.multiply(gu[0], dP[:, 0], out=JT[0, i])
+        JT[0, i] += gu[1] * dP[:, 1] + gu[2] * dP[:, 2]
+        np.multiply(gv[0], dP[:, 0], out=JT[1, i])
+        JT[1, i] += gv[1] * dP[:, 1] + gv[2] * dP[:, 2]
+        JT[0, 3 + i], JT[1, 3 + i] = gu[i], gv[i]                  # tvec
+    JT[0, 6], JT[0, 7], JT[0, 8], JT[0, 9] = xd, 0, 1, 0            # fx fy cx cy
+    JT[1, 6], JT[1, 7], JT[1, 8], JT[1, 9] = 0, yd, 0, 1
+    rx, ry = fx * x * iden, fy * y * iden
+    r4 = r2 * r2
+    r6 = r4 * r2
+    for j, rp in ((10, r2), (11, r4), (14, r6)):                   # k1 k2 k3
+        np.multiply(rx, rp, out=JT[0, j])
+        np.multiply(ry, rp, out=JT[1, j])
+    rx *= -radial
+    ry *= -radial
+    for j, rp in ((15, r2), (16, r4), (17, r6)):                   # k4 k5 k6
+        np.multiply(rx, rp, out=JT[0, j])
+        np.multiply(ry, rp, out=JT[1, j])
+    JT[0, 12], JT[1, 12] = fx * xy2, fy * (r2 + 2 * y * y)          # p1
+    JT[0, 13], JT[1, 13] = fx * (r2 + 2 * x * x), fy * xy2          # p2
+    return uv, JT.transpose(2, 3, 0, 1)
+
+
+def reprojection_errors(object_points, image_points, K, dist, rvecs, tvecs):
+    """
+    每个视角的重投影误差 [{"mean", "rms", "max"}]（像素），与逐张 cv2.projectPoints 的结果一致；
+    各视角点数相同时一次算完，否则逐个视角算
+    """
+    objs = [np.asarray(o, np.float64).reshape(-1, 3) for o in object_points]
+    imgs = [np.asarray(p, np.float64).reshape(-1, 2) for p in image_points]
+    if len({len(o) for o in objs}) == 1:
+        uv = project(np.stack(objs), rvecs, tvecs, K, dist)
+        e_all = np.linalg.norm(uv - np.stack(imgs), axis=-1)
+    else:
+        e_all = [np.linalg.norm(project(o, r, t, K, dist)[0] - p, axis=-1)
+                 for o, p, r, t in zip(objs, imgs, rvecs, tvecs)]
+    return [{"mean": float(e.mean()), "rms": float(np.sqrt((e ** 2).mean())), "max": float(e.max())} for e in e_all]
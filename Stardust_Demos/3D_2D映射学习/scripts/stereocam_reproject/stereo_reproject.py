@@ -2,18 +2,21 @@
 # 从 params.yaml 读内参 K、畸变 D。
 # 读入左右图。
 # 用 ORB 特征匹配 + cv2.findEssentialMat → cv2.recoverPose 恢复 R、t。
-# 用 cv2.stereoRectify 做极线校正。
+# 用 cv2.stereoRectify 做极线校正（映射表用 scripts/camera_model.py 生成、缓存）。
 # 用 StereoSGBM 算视差图。
 # 用 cv2.reprojectImageTo3D 转点云，并保存为 .ply。
 
+import os
+import sys
 import cv2
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from camera_model import CameraModel
+
 # ========= 1. 读取相机参数 =========
-fs = cv2.FileStorage("outputs/calib_out/params.yaml", cv2.FILE_STORAGE_READ)
-K = fs.getNode("camera_matrix").mat()
-D = fs.getNode("distortion_coefficients").mat()
-fs.release()
+cam = CameraModel.from_file("outputs/calib_out/params.yaml")
+K, D = cam.K, cam.dist
 
 print("K=\n", K)
 print("D=\n", D)
@@ -53,11 +56,9 @@ R1, R2, P1, P2, Q, roi1, roi2 = cv2.stereoRectify(
     K, D, K, D, (w, h), R, t, flags=0
 )
 
-map1x, map1y = cv2.initUndistortRectifyMap(K, D, R1, P1, (w, h), cv2.CV_32FC1)
-map2x, map2y = cv2.initUndistortRectifyMap(K, D, R2, P2, (w, h), cv2.CV_32FC1)
-
-rectL = cv2.remap(imgL, map1x, map1y, cv2.INTER_LINEAR)
-rectR = cv2.remap(imgR, map2x, map2y, cv2.INTER_LINEAR)
+# 定点 CV_16SC2 映射表，按 (K, D, R, P, 尺寸) 缓存；同一对相机处理多帧时只算一次
+rectL = cam.remap(imgL, R=R1, P=P1)
+rectR = cam.remap(imgR, R=R2, P=P2)
 
 # ========= 6. SGBM 视差 =========
 stereo = cv2.StereoSGBM_create(
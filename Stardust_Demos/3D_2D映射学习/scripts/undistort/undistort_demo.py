@@ -14,6 +14,8 @@ python undistort_demo.py --img your.png --k1min -0.8 --k1max 0.4 --steps 31 --ou
 Notes:
 - Intrinsics K are guessed from image size (for demo only).
 - Only k1 is searched (k2=p1=p2=k3=0). For rigorous work, calibrate with cv2.calibrateCamera.
+- Undistortion goes through scripts/camera_model.py (fixed-point remap tables, same output as cv2.undistort);
+  --map-cache DIR keeps the tables on disk so re-running on same-size images skips rebuilding them.
 
 自动检测棋盘角点（尝试常见网格大小：9x6、8x6、7x6…）。
 根据图像大小猜测一个K（演示足够；严谨请用标定获得K与dist）。
@@ -22,9 +24,13 @@ Notes:
 """
 import argparse
 import os
+import sys
 import cv2
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from camera_model import CameraModel
+
 def find_chess_corners(gray):
     # Try a few common inner-corner grid sizes
     for (nx, ny) in [(9,6), (8,6), (7,6), (9,7), (8,5)]:
@@ -84,6 +90,7 @@ def main():
     ap.add_argument("--k1min", type=float, default=-0.6, help="min k1 to search")
     ap.add_argument("--k1max", type=float, default=0.6, help="max k1 to search")
     ap.add_argument("--steps", type=int, default=25, help="number of k1 steps")
+    ap.add_argument("--map-cache", default=None, help="directory to cache undistort maps on disk (off if not set)")
     args = ap.parse_args()
 
     gray = cv2.imread(args.img, cv2.IMREAD_GRAYSCALE)
@@ -111,7 +118,7 @@ def main():
     k1_values = np.linspace(args.k1min, args.k1max, max(2, args.steps))
     for k1 in k1_values:
         dist = np.array([k1, 0, 0, 0, 0], dtype=np.float32)  # [k1,k2,p1,p2,k3]
-        und = cv2.undistort(gray, K, dist, None, K)
+        und = CameraModel(K, dist).undistort(gray, cache_dir=args.map_cache)
         grid2, corners2 = find_chess_corners(und)
         if grid2 is None or grid2 != (nx, ny):
             continue
@@ -0,0 +1,212 @@
+"""
+标注 JSON 字段索引：make_sheet1 / make_sheet2 共用。
+
+只保留表格要用的几个字段（见 FIELDS），连同文件名、mtime、size 一起存成 parquet 放在 JSON 目录里。
+字段值保持 JSON 里的原始类型（字符串、数字、布尔……）：同一列里类型可能不一样，parquet 里按 JSON 文本存，
+读出来再还原，写到 Excel 的结果与直接从 JSON 取值相同。
+再次运行时只重新解析 mtime/size 变化过的文件，没变的直接用索引里的结果。
+需要解析的文件按块分给进程池，子进程只把抽出来的字段传回主进程；装了 orjson 时用 orjson 解析。
+
+内存上限：
+- 主进程常驻的只有索引本身：name/error/q_norm 用 pyarrow 字符串存储（没有逐个 Python str 对象的开销），
+  FIELDS 各列是保留原类型的 Python 对象，每个值另有几十字节的对象开销；
+  10 万条、每条字段合计 1KB 时约 150MB，可以用 load_index(...).memory_usage(deep=True).sum() 实测。
+- 解析阶段每个子进程同时最多持有 1 个完整 JSON，传回主进程的只有字段，
+  峰值约 workers × 最大单个文件解析后的大小（JSON 对象一般是文件大小的 5~10 倍）。
+- 完整 JSON 不常驻内存，需要时通过 QuestionMap.doc() 按文件路径现读。
+"""
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from json_path import PathSet
+from text_norm import norm_array, hash_keys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 字段改成按 JSON 文本存之后换了文件名，旧格式（值都转成了字符串）的索引不再读取
+INDEX_FILE = ".anno_index.v2.parquet"
+
+# 索引字段 -> 标注 JSON 里的路径
+FIELDS = {
+    "q_text":   "result.annotations[1].slotsChildren[0].slot.text",
+    "a1_flag":  "result.annotations[1].slotsChildren[0].children[0].input.value",
+    "a1_value": "result.annotations[1].slotsChildren[0].children[1].input.value",
+    "a2_flag":  "result.annotations[2].slotsChildren[0].children[0].input.value",
+    "a2_value": "result.annotations[2].slotsChildren[0].children[1].input.value",
+    "a2_text":  "result.annotations[2].slotsChildren[0].slot.text",
+    "a3_text":  "result.annotations[3].slotsChildren[0].slot.text",
+    "a3_model": "result.annotations[3].slotsChildren[0].children[0].input.value",
+}
+FIELD_PATHS = PathSet(FIELDS, default="")
+# q_norm：归一化后的问题；q_key：q_norm 的 uint64 哈希，表之间按它 join
+COLUMNS = ["name", "mtime_ns", "size", "error", "q_norm", "q_key"] + list(FIELDS)
+
+# 待解析文件少于这个数时不开进程池（进程启动的开销比解析还大）
+PARALLEL_MIN_FILES = 512
+
+
+def extract_fields(j):
+    """从一个标注 JSON 对象里取出 FIELDS，保持原类型（缺失为 ''）；q_norm 回到主进程后整列批量算"""
+    return FIELD_PATHS.extract(j)
+
+
+def _encode_fields(df):
+    """FIELDS 各列 -> JSON 文本（混合类型的列 parquet 存不了，这样原类型也能还原）"""
+    df = df.copy()
+    for name in FIELDS:
+        df[name] = [json.dumps(v, ensure_ascii=False) for v in df[name]]
+    return df
+
+
+def _decode_fields(df):
+    for name in FIELDS:
+        df[name] = pd.Series([json.loads(v) for v in df[name]], index=df.index, dtype=object)
+    return df
+
+
+def loads(raw):
+    """bytes -> JSON 对象；orjson 不接受的输入（NaN、超长整数等）退回标准库再试一次"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw.decode("utf-8"))
+
+
+def parse_file(path):
+    """解析单个文件；坏文件字段全空、error 记下原因，同样写进索引，文件不变就不再重复解析"""
+    try:
+        with open(path, "rb") as f:
+            row = extract_fields(loads(f.read()))
+        row["error"] = ""
+    except Exception as e:
+        row = {name: "" for name in FIELDS}
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def _parse_chunk(paths):
+    return [parse_file(p) for p in paths]
+
+
+def parse_files(paths, workers=None, chunksize=256):
+    """
+    并行解析一批文件，结果与 paths 顺序一致。
+    workers=1 或文件数较少时在当前进程里串行解析。
+    """
+    if workers == 1 or len(paths) < PARALLEL_MIN_FILES:
+        return _parse_chunk(paths)
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_parse_chunk, chunks):
+            rows.extend(part)
+    return rows
+
+
+def load_index(json_dir, index_path=None, workers=None):
+    """
+    返回按文件名排序的 DataFrame（列见 COLUMNS），必要时增量更新并写回索引文件。
+    error 列非空的是解析失败的文件，会打印出来。
+    """
+    index_path = index_path or os.path.join(json_dir, INDEX_FILE)
+
+    stats = {}
+    for e in os.scandir(json_dir):
+        if e.is_file() and e.name.lower().endswith(".json"):
+            st = e.stat()
+            stats[e.name] = (st.st_mtime_ns, st.st_size)
+
+    old = None
+    if os.path.exists(index_path):
+        try:
+            old = pd.read_parquet(index_path)
+            if list(old.columns) != COLUMNS:   # 字段定义改了，整体重建
+                old = None
+        except Exception:
+            old = None
+
+    if old is not None:
+        unchanged = [stats.get(n) == (m, s) for n, m, s in zip(old["name"], old["mtime_ns"], old["size"])]
+        keep = old[unchanged]
+    else:
+        keep = pd.DataFrame(columns=COLUMNS)
+    kept_names = set(keep["name"])
+    todo = sorted(n for n in stats if n not in kept_names)
+
+    rows = parse_files([os.path.join(json_dir, name) for name in todo], workers=workers)
+    for name, row in zip(todo, rows):
+        row["name"] = name
+        row["mtime_ns"], row["size"] = stats[name]
+
+    if rows or len(keep) != (0 if old is None else len(old)):
+        parts = [keep] if len(keep) else []
+        if rows:
+            new = pd.DataFrame(rows, columns=COLUMNS)
+            new["q_norm"] = norm_array(new["q_text"])
+            new["q_key"] = hash_keys(new["q_norm"])
+            parts.append(_encode_fields(new))
+        idx = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS)
+        idx = idx.astype({"mtime_ns": "int64", "size": "int64", "q_key": "uint64"})
+        idx = idx.sort_values("name", kind="stable").reset_index(drop=True)
+        tmp_path = index_path + ".tmp"
+        idx.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, index_path)
+    else:
+        idx = keep.reset_index(drop=True)
+    idx = _decode_fields(idx)
+    idx = idx.astype({c: "string[pyarrow]" for c in ("name", "error", "q_norm")})
+    if todo:
+        print(f"索引更新：重新解析 {len(todo)} 个文件，复用 {len(keep)} 条")
+    bad = idx[idx["error"] != ""]
+    if len(bad):
+        print(f"⚠️ {len(bad)} 个文件解析失败，已跳过：")
+        for name, err in zip(bad["name"].head(20), bad["error"].head(20)):
+            print(f"  {name}: {err}")
+        if len(bad) > 20:
+            print(f"  ……其余 {len(bad) - 20} 个见索引文件 {index_path} 的 error 列")
+    return idx
+
+
+class QuestionMap(object):
+    """
+    {规范化问题: 标注} 的只读映射。内存里只有索引字段（问题重复时保留第一条），
+    完整 JSON 不常驻，doc() 时按文件路径重新读取。
+    """
+
+    def __init__(self, json_dir, idx):
+        self.json_dir = json_dir
+        idx = idx[idx["q_norm"] != ""].drop_duplicates("q_norm", keep="first")
+        self.fields = idx.set_index("q_norm")[["name"] + list(FIELDS)]
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, q):
+        return q in self.fields.index
+
+    def get(self, q, default=None):
+        """该问题的索引字段 dict；没有时返回 default"""
+        if q not in self.fields.index:
+            return default
+        return self.fields.loc[q].to_dict()
+
+    def __getitem__(self, q):
+        rec = self.get(q)
+        if rec is None:
+            raise KeyError(q)
+        return rec
+
+    def path(self, q):
+        return os.path.join(self.json_dir, self.fields.at[q, "name"])
+
+    def doc(self, q):
+        """重新读出完整 JSON（用到索引之外的字段时才需要）"""
+        with open(self.path(q), "rb") as f:
+            return loads(f.read())
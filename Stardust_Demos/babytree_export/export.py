@@ -10,6 +10,8 @@ import cv2
 from tqdm import tqdm
 from openpyxl import Workbook
 import get_rosetta_json
+from export_engine import run_export
+from project_sync import refresh_project
 from stardust import rosetta
 from stardust import rosetta_new
 
@@ -19,38 +21,36 @@ def get_demo():
     return demo
 
 
-def main(project_id, pool_id, project_path, export_path, project_name_CN):
-    time_now = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
-
-    file_list = glob.glob(f'{project_path}/*.json')
-    # file_list = glob.glob(f'{project_path}/*/**.json')
-    qbar = tqdm(file_list, postfix=dict(msg='working'))
-    for file_name in qbar:
-        if file_name.endswith('.DS_Store'):
-            continue
-        demo = get_demo()
-        out_file_name = file_name.split('/')[-1]
-        out_file_name = out_file_name.split('.')[0]
-        with open(file_name, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        # region 这里写处理逻辑
-        for anno in data['result']['annotations']:
-            anno_type = anno['type'].replace('slot','slots')
-            for obj in anno[anno_type]:
-                pass
+def transform(data, name):
+    """
+    单个文件的处理逻辑，在子进程里执行（必须是模块顶层函数）。
+    data: 标注 JSON；name: 文件名（不含扩展名）
+    返回 dict / list[dict] 作为导出结果，返回 None 表示该文件不输出。
+    """
+    demo = get_demo()
+    # region 这里写处理逻辑
+    for anno in data['result']['annotations']:
+        anno_type = anno['type'].replace('slot','slots')
+        for obj in anno[anno_type]:
             pass
         pass
-        # endregion
-
-        export_path1 = f'/Users/stardust/Desktop/Babytree_母婴问答/{export_path}/{project_name_CN}-{project_id}_{time_now}'
-        os.makedirs(export_path1, exist_ok=True)
-        with open(f'{export_path1}/{out_file_name}.json', 'w') as f:
-            # json.dump(demo,f)
-            pass
     pass
+    # endregion
+    return demo
+
+
+def main(project_id, pool_id, project_path, export_path, project_name_CN, output='files', workers=None):
+    """output: files（每个输入一个 json）/ jsonl / parquet（合并成一个文件），见 export_engine"""
+    time_now = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+
+    file_list = sorted(glob.glob(f'{project_path}/*.json'))
+    # file_list = sorted(glob.glob(f'{project_path}/*/**.json'))
+    export_path1 = f'/Users/stardust/Desktop/Babytree_母婴问答/{export_path}/{project_name_CN}-{project_id}_{time_now}'
+    return run_export(file_list, transform, export_path1, output=output, workers=workers)
 
 
-def init(project_id, pool_id, is_check_pool, export_path, project_name_cd):
+def init(project_id, pool_id, is_check_pool, export_path, project_name_cd, incremental=True):
+    """incremental=True：按清单只拆帧新增/变化的数据，没变的保留（见 project_sync）；False 为原来的全量重建"""
     save_path = '/Users/stardust/Desktop/Babytree_母婴问答'
     abs_addr = os.path.abspath(save_path)
     project_path = '/'.join([save_path, str(project_id)])
@@ -58,25 +58,27 @@ def init(project_id, pool_id, is_check_pool, export_path, project_name_cd):
     test_flag = True
     test_flag = False
 
-    if not test_flag:
-        # region 下载数据 开发时注掉，省去下载数据
-        if os.path.exists(project_path):
-            shutil.rmtree(project_path)
-            print(f'已删除目录：{project_path}')
-        print('数据下载中')
-        get_rosetta_json.GetRosData(project_id, pool_id, save_path=save_path,
+    # 平台能列出条目 id 和更新时间时，在这里返回 {id: 更新时间}，download 就会收到 ids，只拉有差异的；
+    # GetRosData 目前只能整包下载，保持 None 即全量下载 + 按内容哈希比对
+    list_items = None
+
+    def download(staging_root, ids=None):
+        get_rosetta_json.GetRosData(project_id, pool_id, save_path=staging_root,
                                     is_check_pool=is_check_pool).get_unziped_data()
-        # get_rosetta_json_big_backdoor.GetRosData(project_id, pool_id, save_path=save_path,
+        # get_rosetta_json_big_backdoor.GetRosData(project_id, pool_id, save_path=staging_root,
         #                             is_check_pool=is_check_pool).get_unziped_data()
+        return os.path.join(staging_root, str(project_id))
 
-        print('数据下载完成')
-        # endregion
+    def split(json_dir):
+        # 如无需拆帧，这里直接 return 即可
+        rosetta.to_split(json_dir)
+        # rosetta_new.to_split(json_dir)
 
-        # region 拆帧 如无需拆帧注掉即可
-        print('开始拆帧')
-        rosetta.to_split(project_path)
-        # rosetta_new.to_split(project_path)
-        print('数据拆帧完毕')
+    if not test_flag:
+        # region 下载数据 + 拆帧 开发时注掉，省去下载数据
+        print('数据下载中')
+        refresh_project(project_path, download, split, full=not incremental, list_items=list_items)
+        print('数据下载、拆帧完毕')
         # endregion
 
     # print('开始处理')
@@ -0,0 +1,143 @@
+"""
+导出引擎：把「逐个 JSON 套处理逻辑、写结果」这件事做成通用框架，新项目只需要写一个 transform 函数。
+
+    def transform(data, name):
+        # data: 解析好的标注 JSON；name: 文件名（不含扩展名）
+        # 返回 dict（一条结果）/ list[dict]（多条）/ None（跳过，不输出）
+        ...
+
+    stats = run_export(file_list, transform, out_dir, output="jsonl")
+
+transform 在进程池里执行，必须是模块顶层函数（子进程要能 pickle 它）。
+
+输出方式 output：
+- "files"：每个输入写一个 {name}.json（与原来的逐文件导出一致），由子进程直接写盘；
+- "jsonl"：所有结果合并成 out_dir/result.jsonl，主进程按输入文件的顺序边收边写（同样的输入，输出逐行相同）；
+- "parquet"：所有结果合并成 out_dir/result.parquet（需要 pyarrow，结果会在主进程里攒齐再写）。
+"""
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+from anno_index import loads
+
+OUTPUTS = ("files", "jsonl", "parquet")
+
+# 文件少于这个数时不开进程池
+PARALLEL_MIN_FILES = 64
+
+
+def _stem(file_name):
+    return os.path.basename(file_name).split('.')[0]
+
+
+def _as_records(result):
+    if result is None:
+        return []
+    if isinstance(result, dict):
+        return [result]
+    return list(result)
+
+
+def _run_one(file_name, transform, out_dir, output):
+    """处理单个文件 -> (状态, 结果记录, 输入字节数, 错误信息)；状态为 ok / skip / error"""
+    try:
+        with open(file_name, 'rb') as f:
+            raw = f.read()
+        name = _stem(file_name)
+        records = _as_records(transform(loads(raw), name))
+        if not records:
+            return "skip", [], len(raw), ""
+        if output == "files":
+            data = records[0] if len(records) == 1 else records
+            with open(os.path.join(out_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            records = []
+        return "ok", records, len(raw), ""
+    except Exception as e:
+        return "error", [], 0, f"{type(e).__name__}: {e}"
+
+
+def _run_chunk(file_names, transform, out_dir, output):
+    return [_run_one(fn, transform, out_dir, output) for fn in file_names]
+
+
+def run_export(file_list, transform, out_dir, output="files", workers=None, chunksize=64,
+               out_name="result"):
+    """
+    用进程池对 file_list 逐个执行 transform 并输出到 out_dir（提前建好，只算一次）。
+    返回统计 dict：total / ok / skipped / failed / errors / records / bytes / seconds / files_per_s / mb_per_s
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f'output 只支持 {OUTPUTS}，收到 {output!r}')
+    file_list = [fn for fn in file_list if not fn.endswith('.DS_Store')]
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.time()
+    stats = dict(total=len(file_list), ok=0, skipped=0, failed=0, errors={}, records=0, bytes=0)
+
+    out_path = None
+    jsonl = None
+    rows = []
+    if output == "jsonl":
+        out_path = os.path.join(out_dir, f'{out_name}.jsonl')
+        jsonl = open(out_path + '.tmp', 'w', encoding='utf-8')
+    elif output == "parquet":
+        out_path = os.path.join(out_dir, f'{out_name}.parquet')
+
+    chunks = [file_list[i:i + chunksize] for i in range(0, len(file_list), chunksize)]
+    qbar = tqdm(total=len(file_list), postfix=dict(msg='working'))
+
+    def collect(names, results):
+        for fn, (status, records, nbytes, err) in zip(names, results):
+            stats['bytes'] += nbytes
+            if status == "error":
+                stats['failed'] += 1
+                stats['errors'][fn] = err
+                continue
+            stats['ok' if status == "ok" else 'skipped'] += 1
+            stats['records'] += len(records) if output != "files" else int(status == "ok")
+            if jsonl is not None:
+                for rec in records:
+                    jsonl.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            elif output == "parquet":
+                rows.extend(records)
+        qbar.update(len(names))
+
+    try:
+        if workers == 1 or len(file_list) < PARALLEL_MIN_FILES:
+            for names in chunks:
+                collect(names, _run_chunk(names, transform, out_dir, output))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                n = len(chunks)
+                results = pool.map(_run_chunk, chunks, [transform] * n, [out_dir] * n, [output] * n)
+                for names, part in zip(chunks, results):
+                    collect(names, part)
+    finally:
+        qbar.close()
+        if jsonl is not None:
+            jsonl.close()
+
+    if jsonl is not None:
+        os.replace(out_path + '.tmp', out_path)
+    elif output == "parquet":
+        import pandas as pd
+        pd.DataFrame(rows).to_parquet(out_path, index=False)
+
+    seconds = time.time() - t0
+    stats['seconds'] = round(seconds, 3)
+    stats['files_per_s'] = round(len(file_list) / seconds, 1) if seconds else 0.0
+    stats['mb_per_s'] = round(stats['bytes'] / 1024 / 1024 / seconds, 2) if seconds else 0.0
+    stats['out_path'] = out_path or out_dir
+
+    print(f"导出完成：共 {stats['total']} 个文件，成功 {stats['ok']}，跳过 {stats['skipped']}，"
+          f"失败 {stats['failed']}，输出 {stats['records']} 条 -> {stats['out_path']}")
+    print(f"耗时 {stats['seconds']}s，{stats['files_per_s']} 个文件/s，{stats['mb_per_s']} MB/s")
+    if stats['failed']:
+        for fn, err in list(stats['errors'].items())[:20]:
+            print(f"  {os.path.basename(fn)}: {err}")
+        if stats['failed'] > 20:
+            print(f"  ……其余 {stats['failed'] - 20} 个见返回值 errors")
+    return stats
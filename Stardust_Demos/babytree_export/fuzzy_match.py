@@ -0,0 +1,170 @@
+"""
+问题近似匹配：字符 n-gram shingle + MinHash 签名 + LSH 分桶。
+
+归一化后完全相等的问题直接命中（相似度 1.0）；其余的只和 LSH 同桶的候选比较 shingle 集合的
+Jaccard 相似度，取不低于阈值的最高者。建索引和查询都是近线性的，不做两两比较。
+
+make_sheet1 / make_sheet2 共用 FUZZY_THRESHOLD，保证两边匹配结果一致。默认只做精确匹配（与原来的输出相同）；
+要打开近似匹配就把 FUZZY_THRESHOLD 改成 0.7 左右，近似命中的行可以在 match_report.csv 里按相似度 < 1 找出来。
+"""
+import zlib
+import numpy as np
+import pandas as pd
+
+from text_norm import hash_keys
+
+# 近似匹配阈值（shingle 集合的 Jaccard 相似度）；None 表示只做精确匹配
+# 2-gram 下，20 个字的问题差 1 个字/标点，相似度约 0.8，打开时 0.7 是比较稳妥的取值
+FUZZY_THRESHOLD = None
+NGRAM = 2
+NUM_PERM = 128
+
+_PRIME = 4294967311          # 2^32 之后的第一个素数；a、b 都小于 2^32，a*h+b 不会溢出 uint64
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+def shingles(s, n=NGRAM):
+    if len(s) <= n:
+        return {s} if s else set()
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def choose_bands(threshold, num_perm):
+    """
+    选 (bands, rows)，使 LSH 的 S 曲线拐点 (1/bands)^(1/rows) 比阈值低 0.1 左右：
+    宁可多放候选进来（最后都会算真实 Jaccard），也不漏掉该命中的
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold - 0.1:
+            best = (bands, rows)
+    return best
+
+
+class QuestionMatcher(object):
+    """
+    m = QuestionMatcher(json_questions)
+    m.match(q)         -> (匹配到的问题 或 None, 相似度)
+    m.match_many(qs)   -> DataFrame[query, match, score]
+
+    每个 band 的签名切片哈希成一个 uint64，按 band 存成排好序的数组，查询时 searchsorted 取同桶候选。
+    """
+
+    def __init__(self, questions, threshold=FUZZY_THRESHOLD, ngram=NGRAM, num_perm=NUM_PERM, seed=1):
+        self.questions = list(dict.fromkeys(q for q in questions if q))   # 去重并保持顺序
+        self.exact = set(self.questions)
+        # 精确匹配按 uint64 哈希键查（match_many 整列 get_indexer），命中后再核对一次原文防碰撞
+        self.key_index = pd.Index(hash_keys(self.questions), dtype="uint64")
+        self.threshold = threshold
+        self.ngram = ngram
+        if threshold is None:
+            return
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        self.shingle_sets = [shingles(q, ngram) for q in self.questions]
+        keys = self._band_hashes(self._signatures(self.shingle_sets))     # (N, bands)
+        self.order = np.argsort(keys, axis=0, kind="stable").T             # (bands, N)
+        self.sorted_keys = np.take_along_axis(keys, self.order.T, axis=0).T
+
+    def _signatures(self, shingle_sets, batch=2000):
+        """一批 shingle 集合（均非空）的 MinHash 签名，(n, num_perm)；按批展开后用 reduceat 求每个集合的最小值"""
+        sigs = np.empty((len(shingle_sets), len(self.a)), dtype=np.uint64)
+        for start in range(0, len(shingle_sets), batch):
+            part = shingle_sets[start:start + batch]
+            sizes = np.fromiter((len(sh) for sh in part), dtype=np.int64, count=len(part))
+            h = np.fromiter((zlib.crc32(x.encode("utf-8")) for sh in part for x in sh),
+                            dtype=np.uint64, count=int(sizes.sum()))
+            hv = (np.outer(h, self.a) + self.b) % np.uint64(_PRIME) & _MASK
+            offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            sigs[start:start + len(part)] = np.minimum.reduceat(hv, offsets, axis=0)
+        return sigs
+
+    def _band_hashes(self, sigs):
+        """(n, num_perm) -> (n, bands)：每个 band 的 rows 个值合成一个 uint64（偶发碰撞只会多出候选）"""
+        bands = sigs[:, :self.bands * self.rows].reshape(len(sigs), self.bands, self.rows)
+        out = np.zeros((len(sigs), self.bands), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for r in range(self.rows):
+                out = out * np.uint64(1000003) + bands[:, :, r]
+        return out
+
+    def _best(self, sh, cands):
+        best, best_score = None, 0.0
+        for i in sorted(cands):
+            score = jaccard(sh, self.shingle_sets[i])
+            if score >= self.threshold and score > best_score:
+                best, best_score = i, score
+        if best is None:
+            return None, 0.0
+        return self.questions[best], best_score
+
+    def _fuzzy(self, queries):
+        """queries: 不在精确集合里的非空问题列表 -> [(match, score)]"""
+        if not queries or not self.questions:
+            return [(None, 0.0)] * len(queries)
+        shs = [shingles(q, self.ngram) for q in queries]
+        keys = self._band_hashes(self._signatures(shs))
+        lo = np.empty_like(keys, dtype=np.int64)
+        hi = np.empty_like(keys, dtype=np.int64)
+        for band in range(self.bands):
+            lo[:, band] = np.searchsorted(self.sorted_keys[band], keys[:, band], side="left")
+            hi[:, band] = np.searchsorted(self.sorted_keys[band], keys[:, band], side="right")
+        out = []
+        for k, sh in enumerate(shs):
+            cands = set()
+            for band in np.nonzero(hi[k] > lo[k])[0]:
+                cands.update(self.order[band, lo[k, band]:hi[k, band]].tolist())
+            out.append(self._best(sh, cands))
+        return out
+
+    def match(self, q):
+        if q in self.exact:
+            return q, 1.0
+        if self.threshold is None or not q:
+            return None, 0.0
+        return self._fuzzy([q])[0]
+
+    def match_many(self, queries):
+        """批量匹配（同一个问题只算一次），返回与 queries 等长的 DataFrame"""
+        queries = np.asarray(queries, dtype=object)
+        codes, uniques = pd.factorize(queries, use_na_sentinel=False)
+        match = np.full(len(uniques), None, dtype=object)
+        score = np.zeros(len(uniques))
+        if len(uniques) and self.questions:
+            if self.key_index.is_unique:
+                pos = self.key_index.get_indexer(hash_keys(uniques))
+                cand = np.asarray(self.questions, dtype=object)[np.maximum(pos, 0)]
+                exact = (pos >= 0) & (cand == uniques)
+            else:   # 哈希撞了（几乎不会发生），退回字符串集合
+                exact = np.fromiter((u in self.exact for u in uniques), dtype=bool, count=len(uniques))
+            match[exact] = uniques[exact]
+            score[exact] = 1.0
+            if self.threshold is not None:
+                todo = np.nonzero(~exact)[0]
+                todo = [i for i in todo if isinstance(uniques[i], str) and uniques[i]]
+                for i, (m, sc) in zip(todo, self._fuzzy([uniques[i] for i in todo])):
+                    match[i], score[i] = m, sc
+        return pd.DataFrame({"query": queries,
+                             "match": match[codes] if len(codes) else match,
+                             "score": score[codes] if len(codes) else score})
+
+
+def write_report(pairs, path):
+    """pairs: DataFrame[query, match, score]，只写匹配上的行"""
+    hit = pairs[pairs["match"].notna()]
+    report = pd.DataFrame({"原问题(归一化)": hit["query"], "匹配到的JSON问题": hit["match"],
+                           "相似度": hit["score"].round(4)})
+    report.to_csv(path, index=False, encoding="utf-8-sig")
+    n_fuzzy = int((hit["score"] < 1.0).sum())
+    print(f"匹配报告：{len(hit)} 对（其中近似匹配 {n_fuzzy} 对）已写入 {path}")
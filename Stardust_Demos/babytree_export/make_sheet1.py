@@ -1,7 +1,10 @@
 import os
-import json
 import pandas as pd
-import unicodedata
+from openpyxl import load_workbook
+
+from anno_index import load_index
+from text_norm import norm, norm_array
+from fuzzy_match import QuestionMatcher, write_report
 
 # 基准目录：脚本所在目录
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,8 +12,14 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_DIR   = os.path.join(BASE_DIR, "3554")                 # ✅ 相对 3554/
 ORIG_XLSX  = os.path.join(BASE_DIR, "babytree原数据.xlsx")   # ✅ 相对 Excel
 OUT_XLSX   = os.path.join(BASE_DIR, "sheet1.xlsx")          # ✅ 输出到项目根
+MATCH_REPORT = os.path.join(BASE_DIR, "match_report.csv")   # 每对匹配的相似度
 SHEET_NAME = "Sheet1"
 TARGET_COUNT = 20
+# 目标条数不到表格总行数的这个比例时，用 openpyxl 只读模式逐行匹配，凑够 TARGET_COUNT 就停；
+# 否则（几乎要扫完整张表）整表读入后整列批量归一化
+STREAM_MAX_RATIO = 0.2
+# 整表读入时问题列按块归一化、匹配，中间数组（归一化文本、哈希键、候选）只占一块的内存
+NORM_CHUNK_ROWS = 50000
 
 # （可选）运行前做存在性检查，报更友好的错
 for p, kind in [(JSON_DIR, "JSON 目录"), (ORIG_XLSX, "原始 Excel")]:
@@ -18,63 +27,100 @@ for p, kind in [(JSON_DIR, "JSON 目录"), (ORIG_XLSX, "原始 Excel")]:
         raise FileNotFoundError(f"{kind} 不存在：{p}")
 
 
-def norm(s):
-    """轻量归一化：None->'', 全角转半角，去首尾空白，连续空白压成1个空格。"""
-    if s is None:
-        return ""
-    s = str(s)
-    s = unicodedata.normalize("NFKC", s)      # 全角->半角/兼容规范化
-    s = " ".join(s.split())                   # 标准化空白
-    return s.strip()
-
 def collect_json_questions(json_dir):
-    """遍历 json，提取 result->annotations[1]->slotsChildren[0]->slot.text"""
-    questions = []
-    files = [f for f in os.listdir(json_dir) if f.lower().endswith(".json")]
-    files.sort()
-    for name in files:
-        path = os.path.join(json_dir, name)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                j = json.load(f)
-            ann = (j.get("result") or {}).get("annotations") or []
-            # 严格按要求取第2个元素（下标1），并从固定路径拿文本
-            if len(ann) > 1:
-                sc = (ann[1].get("slotsChildren") or [])
-                if sc:
-                    slot = (sc[0].get("slot") or {})
-                    q = slot.get("text")
-                    if q:
-                        questions.append(norm(q))
-        except Exception as e:
-            # 安静跳过坏文件
-            pass
-    return questions
+    """提取 result->annotations[1]->slotsChildren[0]->slot.text（走字段索引，只解析有变化的文件）"""
+    idx = load_index(json_dir)
+    return [q for q in idx["q_norm"] if q]
+
+def header_names(header):
+    """与 pd.read_excel 一致的列名：空表头 -> 'Unnamed: i'，重名 -> 'a.1'、'a.2'"""
+    names, seen = [], {}
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None else h
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def stream_matches(xlsx, matcher, target):
+    """
+    只读模式逐行读第一个表，第一列归一化后能匹配到 JSON 问题就收下，收够 target 行立即停止。
+    返回 (DataFrame 或 None(没有任何列), 匹配对 DataFrame[query, match, score], 已扫描的数据行数)；
+    目标条数接近表格行数、不适合逐行扫时返回 (None, None, -1)
+    """
+    wb = load_workbook(xlsx, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        if ws.max_row is None or target >= (ws.max_row - 1) * STREAM_MAX_RATIO:
+            return None, None, -1
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return None, None, 0
+        width = len(header)
+        matched, pairs, scanned = [], [], 0
+        for row in rows:
+            if not any(v is not None for v in row):   # pd.read_excel 同样不计尾部空行
+                continue
+            scanned += 1
+            q = norm(row[0])
+            hit, score = matcher.match(q)
+            if hit is not None:
+                matched.append(tuple(row[:width]) + (None,) * (width - len(row)))
+                pairs.append((q, hit, score))
+                if len(matched) >= target:
+                    break
+    finally:
+        wb.close()
+    pairs = pd.DataFrame(pairs, columns=["query", "match", "score"])
+    return pd.DataFrame(matched, columns=header_names(header)), pairs, scanned
 
 def main():
     # 1) 收集 JSON 中的“问题”集合（归一化）
     json_questions = collect_json_questions(JSON_DIR)
-    json_q_set = set(json_questions)
 
-    if not json_q_set:
+    if not json_questions:
         print("未从 JSON 中提取到任何问题。请检查 /3554/ 下的文件与路径。")
         return
+    # 精确匹配；fuzzy_match.FUZZY_THRESHOLD 不为 None 时再加近似匹配
+    matcher = QuestionMatcher(json_questions)
+
+    # 2) 目标条数远小于表格行数时流式读，凑够就停
+    filtered_20, pairs, scanned = stream_matches(ORIG_XLSX, matcher, TARGET_COUNT)
+    if scanned == 0 and filtered_20 is None:
+        print("原始 Excel 没有任何列。")
+        return
+    if filtered_20 is not None:
+        with pd.ExcelWriter(OUT_XLSX, engine="openpyxl") as writer:
+            filtered_20.to_excel(writer, sheet_name=SHEET_NAME, index=False)
+        write_report(pairs, MATCH_REPORT)
+        print(f"完成：流式扫描原始表前 {scanned} 行，已写入 {len(filtered_20)} 行到 {OUT_XLSX} 的 {SHEET_NAME}。")
+        return
 
-    # 2) 读取原始 Excel（取第一列为“问题”）
+    # 3) 否则读取整张原始 Excel（取第一列为“问题”）
     df = pd.read_excel(ORIG_XLSX, sheet_name=0)  # 默认第一个表
     if df.shape[1] == 0:
         print("原始 Excel 没有任何列。")
         return
 
     first_col_name = df.columns[0]
-    # 归一化后另存一列用于匹配
-    df["_q_norm_"] = df[first_col_name].map(norm)
+    # 按块归一化后匹配（每块内重复的问题只算一次，跨块的由 Normalizer 的 memo 复用）
+    parts = []
+    for start in range(0, len(df), NORM_CHUNK_ROWS):
+        q_norm = norm_array(df[first_col_name].iloc[start:start + NORM_CHUNK_ROWS])
+        parts.append(matcher.match_many(q_norm))
+    pairs = pd.concat(parts, ignore_index=True) if parts else matcher.match_many([])
 
-    # 3) 过滤出匹配到 JSON 问题的行，保持原顺序
-    filtered = df[df["_q_norm_"].isin(json_q_set)].copy()
+    # 过滤出匹配到 JSON 问题的行，保持原顺序
+    hit = pairs["match"].notna().to_numpy()
+    filtered = df[hit].copy()
+    write_report(pairs[hit], MATCH_REPORT)
 
-    # 只取前 20 条
-    filtered_20 = filtered.head(TARGET_COUNT).drop(columns=["_q_norm_"])
+    # 只取前 TARGET_COUNT 条
+    filtered_20 = filtered.head(TARGET_COUNT)
 
     # 4) 写出到 /sheet1.xlsx 的 Sheet1
     with pd.ExcelWriter(OUT_XLSX, engine="openpyxl") as writer:
@@ -1,7 +1,10 @@
 import os
-import json
+import numpy as np
 import pandas as pd
-import unicodedata
+
+from anno_index import FIELDS, QuestionMap, load_index
+from text_norm import norm_array, hash_keys
+from fuzzy_match import QuestionMatcher
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_DIR = os.path.join(BASE_DIR, "3554")
@@ -19,83 +22,50 @@ MODEL_MAP = {
     "8": "8",
 }
 
-def norm(s):
-    """轻量归一化：全角->半角、压空白、去首尾空白，None->''。"""
-    if s is None:
-        return ""
-    s = str(s)
-    s = unicodedata.normalize("NFKC", s)
-    s = " ".join(s.split())
-    return s.strip()
-
-def safe_get(d, path, default=None):
-    """按路径安全取值，path 形如 'a.b[1].c[0].d' """
-    cur = d
-    try:
-        for part in path.replace("]", "").split("."):
-            if "[" in part:
-                key, idx = part.split("[")
-                if key:
-                    cur = cur.get(key, {})
-                cur = cur[int(idx)]
-            else:
-                cur = cur.get(part)
-                if cur is None:
-                    return default
-        return cur if cur is not None else default
-    except Exception:
-        return default
-
 def load_json_questions(json_dir):
-    """建立 {规范化问题: 对应json对象} 的字典（若重复，保留第一条）。"""
-    mapping = {}
-    files = [f for f in os.listdir(json_dir) if f.lower().endswith(".json")]
-    files.sort()
-    for name in files:
-        path = os.path.join(json_dir, name)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                j = json.load(f)
-            q = safe_get(j, "result.annotations[1].slotsChildren[0].slot.text", "")
-            qn = norm(q)
-            if qn and qn not in mapping:
-                mapping[qn] = j
-        except Exception:
-            pass
-    return mapping
+    """
+    {规范化问题: 该条标注的索引字段}（若重复，保留第一条）。
+    只保存字段，不保存整份 JSON；需要完整 JSON 时用返回值的 .doc(问题) 现读。字段含义见 anno_index.FIELDS
+    """
+    return QuestionMap(json_dir, load_index(json_dir))
 
-def col1_real_question_text(j):
+def is_car(flag):
+    # 字段保留原类型（数字、布尔等），与原来的 str(v).strip().lower() 一样先转字符串
+    return flag.astype(str).str.strip().str.lower().eq("car")
+
+def col1_real_question_text(m):
     # 判断值：annotations[1].slotsChildren[0].children[0].input.value
-    v = safe_get(j, "result.annotations[1].slotsChildren[0].children[0].input.value", "")
-    v_norm = str(v).strip().lower()
-    if v_norm == "car":
-        # 取 slot.text
-        return safe_get(j, "result.annotations[1].slotsChildren[0].slot.text", "")
-    else:
-        # 取 children[1].input.value
-        return safe_get(j, "result.annotations[1].slotsChildren[0].children[1].input.value", "")
+    # car 取 slot.text，否则取 children[1].input.value
+    return np.where(is_car(m["a1_flag"]), m["q_text"], m["a1_value"])
 
-def col2_answer_error_text(j):
+def col2_answer_error_text(m):
     # 判断值：annotations[2].slotsChildren[0].children[0].input.value
-    v = safe_get(j, "result.annotations[2].slotsChildren[0].children[0].input.value", "")
-    v_norm = str(v).strip().lower()
-    if v_norm == "car":
-        # 取 children[1].input.value
-        return safe_get(j, "result.annotations[2].slotsChildren[0].children[1].input.value", "")
-    else:
-        # 取 slot.text
-        return safe_get(j, "result.annotations[2].slotsChildren[0].slot.text", "")
+    # car 取 children[1].input.value，否则取 slot.text
+    return np.where(is_car(m["a2_flag"]), m["a2_value"], m["a2_text"])
+
+def col3_best_model_and_answer(m):
+    # 答案 annotations[3]...slot.text，模型id annotations[3]...children[0].input.value
+    model = m["a3_model"].astype(str).str.strip().map(MODEL_MAP).fillna("错误")
+    return np.where(m["a3_text"].astype(bool), "【" + model + "】：" + m["a3_text"].astype(str), "")
 
-def col3_best_model_and_answer(j):
-    # 答案
-    text = safe_get(j, "result.annotations[3].slotsChildren[0].slot.text", "")
-    # 模型id
-    mid = safe_get(j, "result.annotations[3].slotsChildren[0].children[0].input.value", "")
-    mid_str = str(mid).strip()
-    model = MODEL_MAP.get(mid_str, "错误")
-    if not text:
-        return ""
-    return f"【{model}】：{text}"
+def build_sheet2(q_norm, fields):
+    """
+    q_norm: sheet1 每行归一化后的问题（Series）
+    fields: anno_index.load_index 的结果
+    先用与 make_sheet1 相同的匹配器（精确；FUZZY_THRESHOLD 打开时再加近似）把每行问题映射到 JSON 里的问题，
+    再按 uint64 哈希键一次 left merge 把字段对齐到 sheet1 的每一行（保持行序），找不到 json 的行字段为空，三列自然为空
+    """
+    fields = fields.loc[fields["q_norm"] != "", ["q_norm", "q_key"] + list(FIELDS)]
+    fields = fields.drop_duplicates("q_key", keep="first")   # 问题重复时保留第一条
+    matched = QuestionMatcher(fields["q_norm"]).match_many(q_norm)["match"]
+    keys = hash_keys(matched.fillna("").to_numpy(dtype=object))   # 没匹配上的 -> '' 的键，fields 里没有
+    m = pd.DataFrame({"q_key": keys}).merge(fields, on="q_key", how="left")
+    m[list(FIELDS)] = m[list(FIELDS)].fillna("")
+    return pd.DataFrame({
+        "列1_是否真问题": col1_real_question_text(m),
+        "列2_回答是否错误": col2_answer_error_text(m),
+        "列3_最佳模型及答案": col3_best_model_and_answer(m),
+    })
 
 def main():
     # 1) 读 sheet1（第一列问题）
@@ -105,28 +75,15 @@ def main():
     if df1.shape[1] == 0:
         raise ValueError("sheet1.xlsx 没有任何列")
     q_col = df1.columns[0]
-    df1["_q_norm_"] = df1[q_col].map(norm)
+    df1["_q_norm_"] = norm_array(df1[q_col])
 
-    # 2) 建立 JSON 问题 → JSON 对象 的映射
+    # 2) 读取 JSON 字段索引
     if not os.path.isdir(JSON_DIR):
         raise FileNotFoundError(f"未找到 JSON 目录：{JSON_DIR}")
-    q2json = load_json_questions(JSON_DIR)
-
-    # 3) 逐行匹配并生成三列
-    out_rows = []
-    for _, row in df1.iterrows():
-        qn = row["_q_norm_"]
-        j = q2json.get(qn)
-        if not j:
-            # 找不到对应 json，就三列留空
-            out_rows.append({"列1_是否真问题": "", "列2_回答是否错误": "", "列3_最佳模型及答案": ""})
-            continue
-        c1 = col1_real_question_text(j)
-        c2 = col2_answer_error_text(j)
-        c3 = col3_best_model_and_answer(j)
-        out_rows.append({"列1_是否真问题": c1, "列2_回答是否错误": c2, "列3_最佳模型及答案": c3})
+    fields = load_index(JSON_DIR)
 
-    sheet2 = pd.DataFrame(out_rows)
+    # 3) 按问题 merge 后整列生成三列
+    sheet2 = build_sheet2(df1["_q_norm_"], fields)
 
     # 4) 写出 sheet2.xlsx
     sheet2.to_excel(SHEET2_XLSX, sheet_name="Sheet1", index=False)
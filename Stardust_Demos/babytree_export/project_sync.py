@@ -0,0 +1,178 @@
+"""
+项目数据增量刷新：代替「rmtree 整个项目目录 + 全量下载 + 全量拆帧」。
+
+项目目录里维护一份清单 .sync_manifest（JSON 格式），按条目 id（下载下来的 {id}.json）记录版本
+（平台的更新时间/版本号），以及拆帧后属于它的输出文件。每次刷新：
+1. 用 list_items 列出平台上的条目及版本，和清单比对，得到新增/变化/已删除的条目；
+2. 只把新增/变化的条目下载到旁边的暂存目录 {project_path}.staging；
+3. 删掉变化、已删除条目原来的输出，只把新增/变化的 JSON 单独拆帧，再把结果逐个文件合并进项目目录；
+4. 没变化的条目及其拆帧结果原地保留，最后原子写回清单。
+
+GetRosData 目前没有按条目列出/下载的接口，不传 list_items 时退回全量下载 + 内容哈希当版本，
+省下来的是拆帧和重写项目目录的时间。
+
+拆帧输出按文件记录归属：相对路径里某一段与条目同名，或以「条目名 + 分隔符(. _ -)」开头。
+多个条目共用的目录（如 images/）是合并而不是替换，删条目时只删它自己的文件，目录空了才删。
+归属不上的输出照样搬进项目目录，但不进清单（下次同名会被覆盖，删除条目时不会清理）。
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+
+MANIFEST_FILE = ".sync_manifest"   # 不用 .json 后缀，免得被当成标注文件扫进去
+STAGING_SUFFIX = ".staging"
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def scan_items(json_dir):
+    """{条目名: {"hash", "size"}}，条目名即 JSON 文件名去掉 .json"""
+    items = {}
+    for e in os.scandir(json_dir):
+        if e.is_file() and e.name.lower().endswith('.json'):
+            items[e.name[:-5]] = {"hash": file_sha1(e.path), "size": e.stat().st_size}
+    return items
+
+
+def load_manifest(project_path):
+    path = os.path.join(project_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(project_path, manifest):
+    path = os.path.join(project_path, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _owner(rel, names):
+    """拆帧输出 rel（相对路径）属于哪个条目：逐级看路径里的各段，names 按长度倒序保证最长前缀优先"""
+    for part in rel.split(os.sep):
+        for name in names:
+            if part == name or (part.startswith(name) and part[len(name)] in '._-'):
+                return name
+    return None
+
+
+def _merge(src_root, dst_root):
+    """把 src_root 下的文件逐个搬进 dst_root：已有的同名目录合并，不整体替换；返回搬过去的文件相对路径"""
+    moved = []
+    for dirpath, _, filenames in os.walk(src_root):
+        rel_dir = os.path.relpath(dirpath, src_root)
+        for fn in sorted(filenames):
+            rel = fn if rel_dir == '.' else os.path.join(rel_dir, fn)
+            dst = os.path.join(dst_root, rel)
+            if os.path.isdir(dst) and not os.path.islink(dst):
+                shutil.rmtree(dst)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(os.path.join(dirpath, fn), dst)
+            moved.append(rel)
+    return moved
+
+
+def _remove_output(project_path, rel):
+    """删掉一条输出，并顺手清理因此变空的上级目录（共享目录里还有别人的文件就保留）"""
+    _remove(os.path.join(project_path, rel))
+    parent = os.path.dirname(rel)
+    while parent:
+        try:
+            os.rmdir(os.path.join(project_path, parent))
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def refresh_project(project_path, download, split, full=False, list_items=None):
+    """
+    list_items()                 -> {条目 id: 版本}，版本用平台给的更新时间/版本号；
+                                    给了就按它比对，download 只拉有差异的条目
+    download(staging_root[, ids]) -> 下载好的 JSON 所在目录（在 staging_root 之下），
+                                    有 list_items 时多传一个 ids，只下载这些条目
+    split(dir)                   -> 对 dir 里的 JSON 原地拆帧
+    没有 list_items 时全量下载，用内容哈希当版本。
+    full=True 或没有可用清单时，等价于原来的全量重建。
+    返回 dict：added / changed / removed / unchanged（条目 id 列表）/ seconds
+    """
+    t0 = time.time()
+    staging_root = project_path.rstrip('/') + STAGING_SUFFIX
+    _remove(staging_root)
+    os.makedirs(staging_root)
+
+    manifest = None if full or not os.path.isdir(project_path) else load_manifest(project_path)
+    if manifest is None:
+        _remove(project_path)
+        old_items = {}
+    else:
+        old_items = manifest.get("items", {})
+    os.makedirs(project_path, exist_ok=True)
+
+    if list_items is not None:
+        versions = {str(k): str(v) for k, v in list_items().items()}
+        todo = sorted(n for n in versions if old_items.get(n, {}).get("version") != versions[n])
+        staged_dir = download(staging_root, todo) if todo else None
+    else:
+        staged_dir = download(staging_root)
+        versions = {n: rec["hash"] for n, rec in scan_items(staged_dir).items()}
+
+    added = sorted(n for n in versions if n not in old_items)
+    changed = sorted(n for n in versions if n in old_items and old_items[n].get("version") != versions[n])
+    removed = sorted(n for n in old_items if n not in versions)
+    unchanged = sorted(n for n in versions if n in old_items and n not in changed)
+
+    # 旧输出先删掉（变化的条目会重新拆帧）
+    for name in changed + removed:
+        for rel in old_items[name].get("outputs", []):
+            _remove_output(project_path, rel)
+
+    todo = added + changed
+    outputs = {name: [] for name in todo}
+    if todo:
+        work = os.path.join(staging_root, '_split')
+        os.makedirs(work)
+        for name in todo:
+            src = os.path.join(staged_dir, f'{name}.json')
+            if os.path.exists(src):
+                shutil.move(src, os.path.join(work, f'{name}.json'))
+            else:
+                print(f'⚠️ 条目 {name} 没有下载下来，跳过（不进清单，下次再拉）')
+                versions.pop(name)
+        split(work)
+        names = sorted(todo, key=len, reverse=True)
+        for rel in _merge(work, project_path):
+            owner = _owner(rel, names)
+            if owner is not None:
+                outputs[owner].append(rel)
+
+    items = {}
+    for name in sorted(versions):
+        outs = outputs[name] if name in outputs else old_items[name].get("outputs", [])
+        items[name] = {"version": versions[name], "outputs": outs}
+    save_manifest(project_path, {"refreshed_at": time.strftime('%Y-%m-%d %H:%M:%S'), "items": items})
+    _remove(staging_root)
+
+    seconds = round(time.time() - t0, 3)
+    print(f'增量刷新：新增 {len(added)}，变化 {len(changed)}，删除 {len(removed)}，'
+          f'未变 {len(unchanged)}（原样保留），耗时 {seconds}s')
+    return dict(added=added, changed=changed, removed=removed, unchanged=unchanged, seconds=seconds)
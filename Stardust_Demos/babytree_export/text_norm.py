@@ -0,0 +1,96 @@
+"""
+问题文本归一化：单值 norm() 和整列批量版 norm_array() / hash_keys()。
+
+批量版的做法：
+1. pd.factorize 去重，重复的问题只处理一次；跨调用的重复再由 Normalizer 的 memo 挡掉；
+2. 没见过的值一次性交给 pyarrow 字符串内核：NFKC -> 连续空白压成 1 个空格 -> 去首尾空格；
+3. 按编码展开回整列。
+hash_keys() 把归一化后的问题哈希成 uint64，表之间按整数键 join，不再比较 Python 字符串。
+
+与 norm() 的差别：空白字符集合与 str.split() 完全一致（逐个码位核对过）；NFKC 用的是 pyarrow 自带
+的 Unicode 数据，只在 Python unicodedata 版本之后新增的字符上可能不同，中文问答文本里碰不到。
+"""
+import unicodedata
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# 与 str.isspace() 相同的字符集合（RE2 的 \s 不含 \v 和 \x1c-\x1f、\x85）
+_WS_RUN = r"[\t-\r\x{1c}-\x{1f} \x{85}\p{Z}]+"
+
+# memo 超过这个条数就不再往里加（只影响速度，不影响结果）
+MEMO_MAX = 1 << 20
+
+
+def norm(s):
+    """轻量归一化：None->''，全角转半角，去首尾空白，连续空白压成1个空格。"""
+    if s is None:
+        return ""
+    s = str(s)
+    s = unicodedata.normalize("NFKC", s)      # 全角->半角/兼容规范化
+    s = " ".join(s.split())                   # 标准化空白
+    return s.strip()
+
+
+def _norm_strings(strings):
+    """list[str] -> object 类型 np.ndarray，整批走 pyarrow 内核"""
+    arr = pc.utf8_normalize(pa.array(strings, type=pa.string()), "NFKC")
+    arr = pc.replace_substring_regex(arr, _WS_RUN, " ")
+    return pc.utf8_trim(arr, " ").to_numpy(zero_copy_only=False)
+
+
+class Normalizer(object):
+    """
+    批量归一化，带跨调用的 memo（同一批问题会在 JSON 索引、sheet1、sheet2 里反复出现）。
+
+    n = Normalizer()
+    n.normalize(col)   -> object 类型 np.ndarray，逐个值等价于 norm(v)
+    n.keys(col)        -> uint64 np.ndarray，归一化后的哈希键
+    """
+
+    def __init__(self, memo_max=MEMO_MAX):
+        self.memo = {}
+        self.memo_max = memo_max
+
+    def normalize(self, values):
+        values = np.asarray(values, dtype=object)
+        # 与 norm() 对非字符串的处理一致：None -> ''，其余 str()（NaN -> 'nan'、1.0 -> '1.0'）；
+        # 先转好再 factorize，否则 None/NaN、1/1.0/True 会被当成同一个值
+        is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+        if not is_str.all():
+            values = values.copy()
+            values[~is_str] = np.fromiter(("" if v is None else str(v) for v in values[~is_str]),
+                                          dtype=object, count=int((~is_str).sum()))
+        codes, uniques = pd.factorize(values)
+        memo = self.memo
+        if memo:
+            cached = [memo.get(u) for u in uniques]
+            todo = [u for u, c in zip(uniques, cached) if c is None]
+        else:
+            cached, todo = None, list(uniques)
+        done = _norm_strings(todo) if todo else []
+        if cached is None:
+            normed = np.asarray(done, dtype=object)
+        else:
+            it = iter(done)
+            normed = np.fromiter((next(it) if c is None else c for c in cached), dtype=object, count=len(cached))
+        if todo and len(memo) + len(todo) <= self.memo_max:
+            memo.update(zip(todo, done))
+        return normed[codes] if len(codes) else np.empty(0, dtype=object)
+
+    def keys(self, values):
+        return hash_keys(self.normalize(values))
+
+
+def hash_keys(normed):
+    """已归一化的字符串 -> uint64 哈希键（相同字符串得到相同的键）"""
+    return pd.util.hash_array(np.asarray(normed, dtype=object))
+
+
+_default = Normalizer()
+
+
+def norm_array(values):
+    """整列批量归一化，逐个值等价于 norm(v)；共用模块级 memo"""
+    return _default.normalize(values)